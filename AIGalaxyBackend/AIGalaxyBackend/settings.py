@@ -10,6 +10,9 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -144,17 +147,105 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'aitools.firebase_auth.FirebaseAuthentication',
+        'aitools.authentication.CachedJWTAuthentication',
         'aitools.authentication.CsrfExemptSessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'aitools.pagination.StandardPagination',
     'PAGE_SIZE': 12,
 }
 AUTH_USER_MODEL = 'aitools.CustomUser'
 
+# Bearer tokens issued by login and sync_firebase_user (see aitools/authentication.py)
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=14),
+    'AUTH_HEADER_TYPES': ('Bearer',),
+}
+# Seconds a token's user stays cached in process (0 = look it up on every request)
+AUTH_USER_CACHE_TTL = 60
+AUTH_USER_CACHE_SIZE = 1024
+
+# Firebase ID tokens are verified locally (see aitools/firebase_auth.py)
+FIREBASE_PROJECT_ID = os.environ.get('FIREBASE_PROJECT_ID', 'ai-galaxy-54fea')
+FIREBASE_JWKS_URL = os.environ.get(
+    'FIREBASE_JWKS_URL', 'https://www.googleapis.com/service_accounts/v1/jwk/securetoken@system.gserviceaccount.com'
+)
+# Last fetched key set; with FIREBASE_JWKS_URL empty this file is the key set (offline tests)
+FIREBASE_JWKS_FILE = os.environ.get('FIREBASE_JWKS_FILE', str(BASE_DIR / 'firebase-jwks.json'))
+# Seconds fetched keys are kept when the response sets no max-age
+FIREBASE_JWKS_REFRESH = 3600
+# Verified tokens remembered until they expire
+FIREBASE_TOKEN_CACHE_SIZE = 2048
+# Only match tokens to accounts by email once Firebase has verified the address
+FIREBASE_REQUIRE_VERIFIED_EMAIL = True
+
+# The cache also holds the version counters that invalidate cached responses,
+# ETags and Last-Modified (see aitools/cache.py), so every process serving the
+# API must share it: set REDIS_URL (e.g. redis://localhost:6379/0) whenever more
+# than one worker process runs. Without it the in-process cache is used, which
+# is only correct for a single process (runserver, one gunicorn worker):
+# writes handled by one process would not invalidate another's cached data.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'aigalaxy',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'aigalaxy',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+# Seconds anonymous catalog responses stay cached (see aitools/cache.py)
+RESPONSE_CACHE_TIMEOUT = 300
+# Seconds blog view counts are buffered before a batched write (0 = write through)
+BLOG_VIEW_FLUSH_INTERVAL = 10
+if sys.argv[1:2] == ['test']:
+    # Views buffered during a test run would outlive the test database and be
+    # flushed into the real one at exit
+    BLOG_VIEW_FLUSH_INTERVAL = 0
+# Posts in the cached blog home feed (/api/blog/latest/)
+BLOG_FEED_SIZE = 10
+# Public base URL of this API. Responses cached once for every client (the blog
+# feed) build absolute media URLs from it rather than from the request's Host
+API_URL = os.environ.get('API_URL', 'http://localhost:8000')
+# Seconds new favorites and ratings may wait before reordering autocomplete suggestions
+AUTOCOMPLETE_POPULARITY_REFRESH = 300
+# Seconds a user's /api/users/me/bootstrap/ state stays cached (writes invalidate it sooner)
+VIEWER_STATE_CACHE_TIMEOUT = 300
+# Seconds an idle user's version counter is kept (it starts over when missing)
+VIEWER_VERSION_TIMEOUT = 30 * 24 * 3600
+
+# Sitemaps, blog RSS/Atom feeds and URL lists (see aitools/seo_files.py)
+SITE_URL = os.environ.get('SITE_URL', 'http://localhost:3000')
+SITE_URL_PATTERNS = {
+    'blog': '/blog',
+    'post': '/blog/{slug}',
+    'tool': '/tools/{id}',
+    'category': '/categories/{slug}',
+}
+# Generated output, not source: keep it out of the tree in production. The web
+# server serves this directory at SEO_FILES_URL (e.g. nginx `root` with
+# `expires 15m`; types application/rss+xml for .rss, application/atom+xml for
+# .atom); runserver serves it only with DEBUG. Writes regenerate it in the
+# background; run `manage.py generate_seo_files` from cron (every few minutes,
+# cheap when nothing changed) so scheduled posts appear once they go live.
+SEO_FILES_ROOT = os.environ.get('SEO_FILES_ROOT', str(BASE_DIR / 'seo'))
+# Path the generated files are served under, relative to SITE_URL
+SEO_FILES_URL = '/'
+# Seconds a catalog or blog write waits before regenerating, batching bursts (0 = regenerate on commit)
+SEO_REFRESH_DELAY = 30
+
 # CORS Configuration
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -180,8 +271,6 @@ CORS_ALLOW_METHODS = [
     'PUT',
 ]
 
-import os
-
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -15,11 +15,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf.urls.static import static
 from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
+from django.views.static import serve
 
 @require_http_methods(["GET"])
 def api_root(request):
@@ -46,3 +47,8 @@ urlpatterns = [
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # Generated sitemaps/feeds; in production the web server serves SEO_FILES_ROOT
+    urlpatterns += [
+        re_path(r'^(?P<path>sitemap(?:-[a-z]+-\d+)?\.xml|blog\.(?:rss|atom)|(?:tools|categories)\.txt)$',
+                serve, {'document_root': settings.SEO_FILES_ROOT}),
+    ]
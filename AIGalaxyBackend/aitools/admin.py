@@ -5,6 +5,7 @@ from .models import (
     ToolModel, ToolRating, UserFavorite, NewsletterSubscriber, ToolSubmission,
     BlogPost, Comment
 )
+from .cache import bump_version
 
 
 @admin.register(CustomUser)
@@ -30,11 +31,11 @@ class ToolModelInline(admin.TabularInline):
 
 @admin.register(AITool)
 class AIToolAdmin(admin.ModelAdmin):
-    list_display = ('name', 'category', 'is_premium', 'is_popular', 'is_free', 'affiliate', 'link', 'created_at')
+    list_display = ('name', 'category', 'is_premium', 'is_popular', 'is_free', 'affiliate', 'average_rating', 'rating_count', 'link', 'created_at')
     list_filter = ('category', 'is_premium', 'is_popular', 'is_free', 'affiliate')
     search_fields = ('name', 'description')
     ordering = ('-created_at',)
-    readonly_fields = ('preview_image',)
+    readonly_fields = ('preview_image', 'average_rating', 'rating_count', 'favorite_count')
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'category', 'description', 'image', 'preview_image', 'link')
@@ -46,6 +47,9 @@ class AIToolAdmin(admin.ModelAdmin):
             'fields': ('features', 'how_it_works'),
             'classes': ('wide',)
         }),
+        ('Ratings', {
+            'fields': ('average_rating', 'rating_count', 'favorite_count'),
+        }),
     )
     inlines = [ToolModelInline]
 
@@ -233,6 +237,10 @@ class BlogPostAdmin(admin.ModelAdmin):
             'fields': ('likes', 'view_count'),
             'classes': ('collapse',)
         }),
+        ('Rendering', {
+            'classes': ('collapse',),
+            'fields': ('summary', 'word_count', 'reading_time', 'content_hash'),
+        }),
         ('SEO Optimization', {
             'classes': ('collapse',), # Makes this section collapsible/hidden by default
             'fields': ('meta_title', 'meta_description'),
@@ -244,7 +252,8 @@ class BlogPostAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ('created_at', 'updated_at', 'preview_image', 'view_count')
+    readonly_fields = ('created_at', 'updated_at', 'preview_image', 'view_count',
+                       'summary', 'word_count', 'reading_time', 'content_hash')
     
     inlines = [CommentInline]
 
@@ -265,7 +274,7 @@ class BlogPostAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related('author').prefetch_related('likes', 'tools_mentioned', 'comments')
+        return qs.select_related('author').prefetch_related('tools_mentioned', 'comments')
 
 
 @admin.register(Comment)
@@ -273,7 +282,7 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ('author', 'post', 'short_body', 'is_reply_display', 'parent', 'active', 'reply_count', 'created_at')
     list_filter = ('active', 'created_at', 'post')
     search_fields = ('author__username', 'author__email', 'body', 'post__title')
-    readonly_fields = ('created_at', 'updated_at', 'reply_count_display')
+    readonly_fields = ('created_at', 'updated_at', 'reply_count_display', 'thread_root', 'depth', 'descendant_count_display')
     actions = ['approve_comments', 'hide_comments']
     raw_id_fields = ('parent', 'post', 'author')  # Better for performance with many comments
 
@@ -285,7 +294,7 @@ class CommentAdmin(admin.ModelAdmin):
             'fields': ('active',)
         }),
         ('Threading', {
-            'fields': ('reply_count_display',),
+            'fields': ('reply_count_display', 'descendant_count_display', 'thread_root', 'depth'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -310,12 +319,19 @@ class CommentAdmin(admin.ModelAdmin):
         return obj.get_reply_count()
     reply_count_display.short_description = "Number of Replies"
 
+    def descendant_count_display(self, obj):
+        return obj.get_descendant_count()
+    descendant_count_display.short_description = "Replies in Branch"
+
     def approve_comments(self, request, queryset):
         queryset.update(active=True)
+        bump_version('comment')
         self.message_user(request, f"{queryset.count()} comments approved.")
     approve_comments.short_description = "Approve selected comments"
     
     def hide_comments(self, request, queryset):
-        queryset.update(active=False)
-        self.message_user(request, f"{queryset.count()} comments hidden.")
-    hide_comments.short_description = "Hide selected comments"
+        # Hide whole branches: a hidden comment takes its replies with it
+        hidden = Comment.objects.in_subtrees(queryset, include_self=True).filter(active=True).update(active=False)
+        bump_version('comment')
+        self.message_user(request, f"{hidden} comments hidden.")
+    hide_comments.short_description = "Hide selected comments and their replies"
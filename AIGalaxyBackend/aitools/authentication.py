@@ -1,4 +1,22 @@
+"""
+API authentication.
+
+Clients send ``Authorization: Bearer <access token>`` with a JWT issued by
+``issue_tokens`` (login and sync_firebase_user return one). CachedJWTAuthentication
+resolves the token's user_id claim through a short-lived in-process cache, so an
+authenticated request costs no session or user queries; saving or deleting a user
+drops it from this process's cache, and AUTH_USER_CACHE_TTL bounds staleness in others.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
 from rest_framework.authentication import SessionAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 
 
 class CsrfExemptSessionAuthentication(SessionAuthentication):
@@ -10,3 +28,69 @@ class CsrfExemptSessionAuthentication(SessionAuthentication):
         # Skip CSRF check for API endpoints
         return
 
+
+def issue_tokens(user):
+    """A fresh refresh/access token pair for ``user``"""
+    refresh = RefreshToken.for_user(user)
+    return {'access': str(refresh.access_token), 'refresh': str(refresh)}
+
+
+class UserCache:
+    """Bounded LRU of user id -> (expiry, user) shared by the request threads of a process"""
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024)
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+        # Views may modify request.user; never hand out the shared instance
+        return copy.copy(entry[1])
+
+    def set(self, user_id, user):
+        if not self.ttl:
+            return
+        with self._lock:
+            self._users[user_id] = (time.monotonic() + self.ttl, copy.copy(user))
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the user_id claim through ``user_cache``"""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            # Validates the claim and the user (missing, inactive) as usual
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        return user
@@ -0,0 +1,153 @@
+"""
+In-process typeahead index over tool, model, category and published post names.
+
+Every name is indexed under its normalized form and under each word it contains,
+in one sorted array searched with bisect. Entries are numbered by popularity, so
+the best matches of a prefix are simply its smallest entry numbers; one- and
+two-character prefixes, which match the most keys, get precomputed lists.
+
+The index lives in the process and is rebuilt lazily (four queries) the first time
+it's used after one of the version counters in aitools.cache changes. Favorites and
+ratings only reorder entries, so their counters trigger a rebuild at most every
+AUTOCOMPLETE_POPULARITY_REFRESH seconds.
+"""
+import bisect
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.db.models import F
+
+from .cache import get_versions
+
+VERSION_MODELS = ('aitool', 'toolmodel', 'category', 'blogpost')
+# Favorites and ratings change tool popularity (the entry order) with .update(), bumping no aitool version
+POPULARITY_MODELS = ('userfavorite', 'toolrating')
+SHORT_PREFIX = 2
+MAX_LIMIT = 20
+
+NON_WORD_RE = re.compile(r'[^\w]+', re.UNICODE)
+
+
+def normalize(text):
+    """Lowercase, accent-free, punctuation-free text with single spaces"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(NON_WORD_RE.sub(' ', text.lower()).split())
+
+
+def index_keys(label):
+    """The normalized label plus the rest of it from each later word ("gpt 4" for "Chat GPT-4")"""
+    words = normalize(label).split()
+    return {' '.join(words[start:]) for start in range(len(words))}
+
+
+class TypeaheadIndex:
+    def __init__(self, entries):
+        # Entry number = popularity rank, so lower numbers are better matches
+        self.entries = sorted(entries, key=lambda entry: (-entry['score'], entry['label']))
+        pairs = sorted(
+            (key, rank) for rank, entry in enumerate(self.entries) for key in index_keys(entry['label'])
+        )
+        self.keys = [key for key, _ in pairs]
+        self.ranks = [rank for _, rank in pairs]
+        short = {}
+        for key, rank in pairs:
+            for length in range(1, min(SHORT_PREFIX, len(key)) + 1):
+                short.setdefault(key[:length], set()).add(rank)
+        self.short = {prefix: sorted(ranks) for prefix, ranks in short.items()}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def matching_ranks(self, prefix):
+        """Entry numbers whose keys start with ``prefix``, best first"""
+        if len(prefix) <= SHORT_PREFIX:
+            return self.short.get(prefix, [])
+        low = bisect.bisect_left(self.keys, prefix)
+        high = bisect.bisect_left(self.keys, prefix + '\U0010ffff', low)
+        return sorted(set(self.ranks[low:high]))
+
+    def search(self, query, limit=10, types=None):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        results = []
+        for rank in self.matching_ranks(prefix):
+            entry = self.entries[rank]
+            if types and entry['type'] not in types:
+                continue
+            results.append(entry)
+            if len(results) >= limit:
+                break
+        return results
+
+
+def load_entries():
+    """Suggestion entries with a popularity score, in four queries"""
+    from .models import AITool, BlogPost, Category, ToolModel
+
+    tool_scores = {}
+    entries = []
+    tools = AITool.objects.values_list('id', 'name', 'is_popular', 'favorite_count', 'rating_count')
+    for tool_id, name, is_popular, favorites, ratings in tools:
+        # Same weighting as Category.popularity_score: a popular flag is worth ten favorites
+        score = Category.POPULAR_TOOL_WEIGHT * is_popular + favorites + ratings
+        tool_scores[tool_id] = score
+        entries.append({'type': 'tool', 'id': tool_id, 'label': name, 'score': score})
+    for model_id, name, tool_id, tool_name in ToolModel.objects.values_list('id', 'name', 'tool_id', 'tool__name'):
+        entries.append({
+            'type': 'model', 'id': model_id, 'label': name, 'tool_id': tool_id, 'tool': tool_name,
+            'score': tool_scores.get(tool_id, 0),
+        })
+    for category_id, name, slug, score in Category.objects.with_tool_stats().values_list(
+            'id', 'name', 'slug', 'popularity_score'):
+        entries.append({'type': 'category', 'id': category_id, 'label': name, 'slug': slug, 'score': score})
+    posts = BlogPost.objects.published().values_list(
+        'id', 'title', 'slug', F('view_count') + F('like_count')
+    )
+    for post_id, title, slug, score in posts:
+        entries.append({'type': 'post', 'id': post_id, 'label': title, 'slug': slug, 'score': score})
+    return entries
+
+
+class LazyTypeaheadIndex:
+    """
+    Process-wide TypeaheadIndex, rebuilt when the VERSION_MODELS counters move, or
+    when the POPULARITY_MODELS counters have moved and the index is older than
+    AUTOCOMPLETE_POPULARITY_REFRESH seconds.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._versions = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_stale(self, versions):
+        if self._index is None or versions[:len(VERSION_MODELS)] != self._versions[:len(VERSION_MODELS)]:
+            return True
+        refresh = getattr(settings, 'AUTOCOMPLETE_POPULARITY_REFRESH', 300)
+        return versions != self._versions and time.monotonic() - self._built_at >= refresh
+
+    def get(self):
+        versions = get_versions(*VERSION_MODELS, *POPULARITY_MODELS)
+        if self.is_stale(versions):
+            # Only one thread rebuilds; the others keep serving the previous index meanwhile
+            if self._lock.acquire(blocking=self._index is None):
+                try:
+                    if self.is_stale(versions):
+                        self._index = TypeaheadIndex(load_entries())
+                        self._versions = versions
+                        self._built_at = time.monotonic()
+                finally:
+                    self._lock.release()
+        return self._index
+
+    def search(self, query, limit=10, types=None):
+        return self.get().search(query, limit=limit, types=types)
+
+
+typeahead_index = LazyTypeaheadIndex()
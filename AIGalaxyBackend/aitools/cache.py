@@ -0,0 +1,140 @@
+"""
+Versioned response cache for anonymous catalog reads.
+
+Cache keys embed a per-model version counter that model signals bump on every
+write (see aitools.signals), so stale entries are never served and no explicit
+invalidation is needed: they simply stop being looked up and expire. Changes
+that take effect later, like scheduled posts, schedule a bump for their time.
+Model counters never expire; per-object counters (like a user's) pass a timeout
+so idle ones leave the cache, since a missing counter simply starts a new version.
+Works with any Django cache backend, but every process must share it for a
+write in one to invalidate another's entries (see CACHES in settings).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+VERSION_KEY = 'aitools:version:{label}'
+SCHEDULE_KEY = 'aitools:version-schedule:{label}'
+BUMPED_KEY = 'aitools:version-bumped:{label}'
+STATS_KEY = 'aitools:response-cache:{outcome}'
+
+
+def get_versions(*labels, timeout=None):
+    """Return the current version counter of each label; ``timeout`` applies to counters created here"""
+    keys = [VERSION_KEY.format(label=label) for label in labels]
+    schedule_keys = [SCHEDULE_KEY.format(label=label) for label in labels]
+    versions = cache.get_many(keys + schedule_keys)
+    now = time.time()
+    for label, key, schedule_key in zip(labels, keys, schedule_keys):
+        pending = versions.get(schedule_key)
+        if pending and pending[0] <= now:
+            # A scheduled change (e.g. a post's publication time) has come due
+            cache.set(schedule_key, [at for at in pending if at > now], timeout=timeout)
+            bump_version(label, timeout=timeout)
+            versions.pop(key, None)
+        if key not in versions:
+            # Seed from the clock so a counter evicted from the cache never
+            # comes back with a value an older cached response was keyed on
+            cache.add(key, int(time.time() * 1000), timeout=timeout)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(label, timeout=None):
+    # Record the time first: whoever sees the new version also sees a time at least this late
+    cache.set(BUMPED_KEY.format(label=label), time.time(), timeout=timeout)
+    key = VERSION_KEY.format(label=label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, int(time.time() * 1000), timeout=timeout)
+        return
+    if timeout is not None:
+        # incr() keeps the old expiry; a busy counter should outlive its last write
+        cache.touch(key, timeout)
+
+
+def last_bumped(*labels):
+    """When any of ``labels`` last changed (epoch seconds); an unrecorded time counts as now"""
+    keys = [BUMPED_KEY.format(label=label) for label in labels]
+    times = cache.get_many(keys)
+    for key in keys:
+        if key not in times:
+            cache.add(key, time.time(), timeout=None)
+            times[key] = cache.get(key, time.time())
+    return max(times.values(), default=None)
+
+
+def schedule_bump(label, when):
+    """Bump ``label``'s version once the aware datetime ``when`` has passed, without any write"""
+    key = SCHEDULE_KEY.format(label=label)
+    pending = cache.get(key) or []
+    at = when.timestamp()
+    if at not in pending:
+        cache.set(key, sorted(pending + [at]), timeout=None)
+
+
+def record(outcome):
+    key = STATS_KEY.format(outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_stats():
+    hits = cache.get(STATS_KEY.format(outcome='hit'), 0)
+    misses = cache.get(STATS_KEY.format(outcome='miss'), 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
+
+
+class CachedResponseMixin:
+    """
+    Cache the response data of anonymous GETs for the actions in ``cache_actions``.
+
+    Keys combine the origin (serializers build absolute media URLs from it), the
+    path, the sorted query string and the version counters of ``cache_models``,
+    so any write to one of those models invalidates them.
+    """
+    cache_actions = ('list', 'retrieve')
+    cache_models = ()
+    cache_timeout = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (request.method == 'GET' and self.action in self.cache_actions
+                and not request.user.is_authenticated):
+            handler = self.get
+            self.get = lambda request, *args, **kwargs: self.cached_response(handler, request, *args, **kwargs)
+
+    def get_cache_key(self, request):
+        query = sorted(request.query_params.lists())
+        versions = get_versions(*self.cache_models)
+        raw = f"{request.build_absolute_uri(request.path)}?{query}|{versions}"
+        return 'aitools:response:' + hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            record('hit')
+            data, status_code = cached
+            response = Response(data, status=status_code)
+            response['X-Cache'] = 'HIT'
+            return response
+        record('miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, Response):
+            timeout = self.cache_timeout or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+            cache.set(key, (response.data, response.status_code), timeout)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,78 @@
+"""
+Conditional GET (ETag / Last-Modified) for DRF viewsets.
+
+The ETag is derived from the version counters in aitools.cache (bumped by model
+signals on every write), the request path/query and the viewer, so answering a
+matching If-None-Match costs no database query. Last-Modified is the time one of
+those counters was last bumped, so deletes and ``.update()`` writes advance it too
+and it costs no query either; it is per collection, which errs towards "modified".
+"""
+import hashlib
+from datetime import datetime, timezone
+
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import get_versions, last_bumped
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag and Last-Modified to GET responses of ``conditional_actions`` and answer
+    304 Not Modified without running the handler (no query, no serialization).
+
+    ``cache_models`` lists the model labels whose version counters the response depends on.
+    """
+    conditional_actions = ('list', 'retrieve')
+    cache_models = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method == 'GET' and self.action in self.conditional_actions:
+            handler = self.get
+            self.get = lambda request, *args, **kwargs: self.conditional_response(handler, request, *args, **kwargs)
+
+    def get_etag(self, request):
+        viewer = request.user.pk if request.user.is_authenticated else 'anon'
+        query = sorted(request.query_params.lists())
+        versions = get_versions(*self.cache_models)
+        raw = f"{request.path}?{query}|{versions}|{viewer}|{request.accepted_media_type}"
+        return 'W/' + quote_etag(hashlib.md5(raw.encode('utf-8')).hexdigest())
+
+    def get_last_modified(self):
+        bumped = last_bumped(*self.cache_models)
+        return datetime.fromtimestamp(bumped, tz=timezone.utc) if bumped is not None else None
+
+    def not_modified(self, request):
+        """Hook for side effects that must happen even when the body isn't sent"""
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if_none_match = request.headers.get('If-None-Match')
+        last_modified = None
+        if if_none_match is not None:
+            not_modified = etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+        else:
+            last_modified = self.get_last_modified()
+            if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+            not_modified = (
+                last_modified is not None and if_modified_since is not None
+                and int(last_modified.timestamp()) <= if_modified_since
+            )
+
+        if not_modified:
+            self.not_modified(request)
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            if last_modified is None:
+                last_modified = self.get_last_modified()
+
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['Cache-Control'] = 'no-cache' if not request.user.is_authenticated else 'private, no-cache'
+        return response
@@ -0,0 +1,55 @@
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+def parse_bool(value):
+    value = value.lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    return None
+
+
+def parse_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_str(value):
+    return value
+
+
+class DeclarativeFilterBackend(BaseFilterBackend):
+    """
+    Filter a queryset from query params declared on the view, e.g.
+    ``filter_fields = {'category': ('category__slug', parse_str)}``.
+    Empty values and values that fail to parse are ignored.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for param, (lookup, parser) in getattr(view, 'filter_fields', {}).items():
+            raw = request.query_params.get(param)
+            if not raw:
+                continue
+            value = parser(raw)
+            if value is None:
+                continue
+            queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+
+class AliasOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter that also accepts named orderings declared on the view as
+    ``ordering_aliases = {'newest': ['-created_at', '-id']}``.
+    Unknown values fall back to the whitelisted ``ordering_fields``.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        param = request.query_params.get(self.ordering_param)
+        aliases = getattr(view, 'ordering_aliases', {})
+        if param in aliases:
+            return list(aliases[param])
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,246 @@
+"""
+Firebase ID token authentication.
+
+The frontend signs users in with Firebase and sends the ID token as
+``Authorization: Bearer <token>``. Tokens are verified locally (RS256 against
+Google's published key set, audience/issuer = FIREBASE_PROJECT_ID) and matched to
+a CustomUser by their email.
+
+* The key set is kept in process and in FIREBASE_JWKS_FILE, refreshed when the
+  fetched copy's max-age runs out or a token names an unknown key. Without a
+  FIREBASE_JWKS_URL only the file is used, which is how offline tests provide keys.
+* Verified tokens are remembered in a bounded LRU (token -> claims, user id) until
+  they expire, so repeat requests skip the signature check, and the user comes from
+  aitools.authentication.user_cache, so they usually skip the user query too.
+
+A verified token whose email has no account yet authenticates as anonymous with
+the claims in ``request.auth``; sync_firebase_user creates the account from them.
+So does a token whose email Firebase hasn't verified (FIREBASE_REQUIRE_VERIFIED_EMAIL):
+it is never matched to an account, so public reads keep working while endpoints
+that need an identity (sync, favorites, ratings, comments) refuse it.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+
+import jwt
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .authentication import user_cache
+
+logger = logging.getLogger(__name__)
+
+ALGORITHM = 'RS256'
+CLOCK_SKEW = 10
+# Unknown key ids trigger a refetch at most this often (seconds)
+MIN_REFRESH_INTERVAL = 60
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+class FirebaseClaims(dict):
+    """Verified ID token claims, as ``request.auth`` of Firebase-authenticated requests"""
+
+    @property
+    def email(self):
+        return self.get('email')
+
+    @property
+    def identifies_user(self):
+        """Whether the email may be matched to an account"""
+        return bool(self.get('email_verified')) or not settings.FIREBASE_REQUIRE_VERIFIED_EMAIL
+
+
+class FirebaseKeySet:
+    """Google's token signing keys by key id, cached in process and on disk"""
+
+    def __init__(self):
+        self._keys = {}
+        self._expires_at = 0
+        self._last_refresh = 0
+        self._lock = threading.Lock()
+
+    def get(self, kid):
+        if not self._keys or time.time() >= self._expires_at:
+            self.refresh(blocking=not self._keys)
+        elif kid not in self._keys and time.time() - self._last_refresh >= MIN_REFRESH_INTERVAL:
+            # Google rotates keys ahead of their max-age; a new kid means we're behind
+            self.refresh(blocking=True, fetch=True)
+        return self._keys.get(kid)
+
+    def refresh(self, blocking=True, fetch=False):
+        # Only one thread refreshes; without blocking the others keep the current keys
+        if not self._lock.acquire(blocking=blocking):
+            return
+        try:
+            self._last_refresh = time.time()
+            data = None if fetch and settings.FIREBASE_JWKS_URL else self.read_file()
+            if data is None or (settings.FIREBASE_JWKS_URL and data['expires_at'] <= time.time()):
+                data = self.fetch() or data
+            if data is not None:
+                self._keys = self.parse(data['keys'])
+                self._expires_at = data['expires_at']
+        finally:
+            self._lock.release()
+
+    def read_file(self):
+        path = settings.FIREBASE_JWKS_FILE
+        try:
+            with open(path) as keys_file:
+                data = json.load(keys_file)
+        except (OSError, ValueError):
+            return None
+        if not settings.FIREBASE_JWKS_URL:
+            # Nothing to refresh from: the file is the key set, re-read when it changes
+            data['expires_at'] = os.path.getmtime(path) + MIN_REFRESH_INTERVAL
+        return {'keys': data.get('keys', []), 'expires_at': data.get('expires_at', 0)}
+
+    def fetch(self):
+        if not settings.FIREBASE_JWKS_URL:
+            return None
+        try:
+            with urllib.request.urlopen(settings.FIREBASE_JWKS_URL, timeout=5) as response:
+                keys = json.load(response).get('keys', [])
+                max_age = MAX_AGE_RE.search(response.headers.get('Cache-Control', ''))
+        except (OSError, ValueError) as error:
+            logger.warning("Could not fetch Firebase signing keys: %s", error)
+            return None
+        ttl = int(max_age.group(1)) if max_age else settings.FIREBASE_JWKS_REFRESH
+        data = {'keys': keys, 'expires_at': time.time() + ttl}
+        try:
+            temporary = f'{settings.FIREBASE_JWKS_FILE}.tmp'
+            with open(temporary, 'w') as keys_file:
+                json.dump(data, keys_file)
+            os.replace(temporary, settings.FIREBASE_JWKS_FILE)
+        except OSError as error:
+            logger.warning("Could not store Firebase signing keys: %s", error)
+        return data
+
+    @staticmethod
+    def parse(jwks):
+        keys = {}
+        for jwk in jwks:
+            try:
+                keys[jwk['kid']] = jwt.PyJWK(jwk, algorithm=ALGORITHM)
+            except (KeyError, jwt.PyJWKError) as error:
+                logger.warning("Skipping unusable Firebase signing key: %s", error)
+        return keys
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of token digest -> (expiry, claims, user id) for tokens already verified"""
+
+    def __init__(self):
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode('ascii')).digest()
+
+    def get(self, token):
+        key = self.digest(token)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._tokens[key]
+                return None
+            self._tokens.move_to_end(key)
+            return entry
+
+    def set(self, token, claims, user_id):
+        key = self.digest(token)
+        with self._lock:
+            self._tokens[key] = (claims['exp'], claims, user_id)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > settings.FIREBASE_TOKEN_CACHE_SIZE:
+                self._tokens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+
+key_set = FirebaseKeySet()
+token_cache = VerifiedTokenCache()
+
+
+def verify_id_token(token, header):
+    """Claims of a Firebase ID token, or AuthenticationFailed"""
+    key = key_set.get(header.get('kid'))
+    if key is None:
+        raise exceptions.AuthenticationFailed('Firebase token signed with an unknown key.')
+    project_id = settings.FIREBASE_PROJECT_ID
+    try:
+        claims = jwt.decode(
+            token, key.key, algorithms=[ALGORITHM], audience=project_id,
+            issuer=f'https://securetoken.google.com/{project_id}', leeway=CLOCK_SKEW,
+            options={'require': ['exp', 'iat', 'aud', 'iss', 'sub']},
+        )
+    except jwt.InvalidTokenError as error:
+        raise exceptions.AuthenticationFailed(f'Invalid Firebase token: {error}')
+    if not claims['sub'] or claims.get('auth_time', 0) > time.time() + CLOCK_SKEW:
+        raise exceptions.AuthenticationFailed('Invalid Firebase token.')
+    if not claims.get('email'):
+        raise exceptions.AuthenticationFailed('Firebase token has no email address.')
+    return FirebaseClaims(claims)
+
+
+class FirebaseAuthentication(BaseAuthentication):
+    """Authenticate ``Bearer`` Firebase ID tokens; other bearer tokens are left to the next class"""
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if len(auth) != 2 or auth[0].lower() != b'bearer':
+            return None
+        try:
+            token = auth[1].decode('ascii')
+        except UnicodeError:
+            return None
+
+        entry = token_cache.get(token)
+        if entry is not None:
+            _, claims, user_id = entry
+        else:
+            try:
+                header = jwt.get_unverified_header(token)
+            except jwt.DecodeError:
+                return None
+            if header.get('alg') != ALGORITHM:
+                # Our own access tokens (HS256) belong to CachedJWTAuthentication
+                return None
+            claims, user_id = verify_id_token(token, header), None
+
+        # An unverified Firebase account could otherwise claim an existing user's email
+        user = self.get_user(claims, user_id) if claims.identifies_user else None
+        if user is None:
+            token_cache.set(token, claims, None)
+            return (AnonymousUser(), claims)
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User is inactive.', code='user_inactive')
+        token_cache.set(token, claims, user.pk)
+        return (user, claims)
+
+    def get_user(self, claims, user_id=None):
+        from .models import CustomUser
+
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            lookup = {'pk': user_id} if user_id is not None else {'email': claims.email}
+            user = CustomUser.objects.filter(**lookup).first()
+            if user is not None:
+                user_cache.set(user.pk, user)
+        return user
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from aitools.seo_files import SECTIONS, seo_files
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the sitemaps, blog RSS/Atom feeds and URL lists whose data changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sections', nargs='*',
+            help=f"Rebuild these sections regardless of their versions ({', '.join(SECTIONS)}; default: only stale ones)"
+        )
+        parser.add_argument('--force', action='store_true', help='Rebuild every section')
+
+    def handle(self, *args, **options):
+        unknown = set(options['sections']) - set(SECTIONS)
+        if unknown:
+            raise CommandError(f"Unknown section(s): {', '.join(sorted(unknown))}")
+        rebuilt = seo_files.refresh(sections=options['sections'] or None, force=options['force'])
+        if rebuilt:
+            self.stdout.write(self.style.SUCCESS(f"Regenerated {', '.join(rebuilt)} in {seo_files.root}."))
+        else:
+            self.stdout.write(f"Everything in {seo_files.root} is up to date.")
@@ -0,0 +1,232 @@
+import csv
+import json
+import os
+import secrets
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from aitools.models import CustomUser
+
+# Column order of `firebase auth:export --format=csv` (no header row)
+CSV_COLUMNS = {'uid': 0, 'email': 1, 'email_verified': 2, 'name': 5, 'created_at': 23, 'last_signed_in_at': 24}
+CSV_WIDTH = max(CSV_COLUMNS.values()) + 1
+READ_SIZE = 1 << 16
+
+
+def iter_json_users(path):
+    """Records of a `firebase auth:export --format=json` file, decoded one at a time"""
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as export:
+        buffer = export.read(READ_SIZE)
+        start = buffer.find('[')
+        while start < 0:
+            more = export.read(READ_SIZE)
+            if not more:
+                return
+            buffer += more
+            start = buffer.find('[')
+        position = start + 1
+        while True:
+            # Skip separators, then decode the next record, reading more until it is complete
+            while True:
+                while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                    position += 1
+                if position < len(buffer):
+                    break
+                buffer, position = export.read(READ_SIZE), 0
+                if not buffer:
+                    return
+            if buffer[position] == ']':
+                return
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                more = export.read(READ_SIZE)
+                if not more:
+                    raise CommandError(f'Truncated JSON export at offset {position}')
+                buffer, position = buffer[position:] + more, 0
+                continue
+            yield {
+                'uid': record.get('localId'),
+                'email': record.get('email'),
+                'name': record.get('displayName') or '',
+                'created_at': record.get('createdAt'),
+                'last_signed_in_at': record.get('lastSignedInAt'),
+                'disabled': record.get('disabled', False),
+            }
+            position = end
+
+
+def iter_csv_users(path):
+    with open(path, newline='', encoding='utf-8') as export:
+        for row in csv.reader(export):
+            if not row or row[0] == 'UID':
+                continue
+            row += [''] * (CSV_WIDTH - len(row))
+            yield {
+                'uid': row[CSV_COLUMNS['uid']],
+                'email': row[CSV_COLUMNS['email']],
+                'name': row[CSV_COLUMNS['name']],
+                'created_at': row[CSV_COLUMNS['created_at']],
+                'last_signed_in_at': row[CSV_COLUMNS['last_signed_in_at']],
+                'disabled': False,
+            }
+
+
+def from_millis(value):
+    try:
+        return datetime.fromtimestamp(int(value) / 1000, tz=dt_timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+class UsernameAllocator:
+    """CustomUserManager.pick_username over an in-memory set, remembering the next suffix per base"""
+
+    def __init__(self, taken):
+        self.taken = taken
+        self.next_suffix = {}
+
+    def allocate(self, base):
+        if base in self.taken:
+            suffix = self.next_suffix.get(base, 1)
+            while f'{base}{suffix}' in self.taken:
+                suffix += 1
+            self.next_suffix[base] = suffix + 1
+            base = f'{base}{suffix}'
+        self.taken.add(base)
+        return base
+
+
+class Command(BaseCommand):
+    help = (
+        'Import users from a Firebase auth export (JSON or CSV) with bulk inserts. '
+        'Existing emails are skipped and progress is checkpointed, so an interrupted import can simply be rerun.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File written by `firebase auth:export`')
+        parser.add_argument('--format', choices=['json', 'csv'], help='Default: from the file extension')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--checkpoint',
+            help='Progress file; records it counts as done are skipped on the next run (default: <path>.progress)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'No such file: {path}')
+        export_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if export_format not in ('json', 'csv'):
+            raise CommandError('Cannot tell the export format; pass --format json or --format csv')
+        records = iter_json_users(path) if export_format == 'json' else iter_csv_users(path)
+        checkpoint = options['checkpoint'] or f'{path}.progress'
+        batch_size = options['batch_size']
+
+        done = self.read_checkpoint(checkpoint, path)
+        if done:
+            self.stdout.write(f'Resuming after {done} record(s) from {checkpoint}')
+        # Usernames and emails already taken, so collisions are resolved without queries
+        emails = set(CustomUser.objects.values_list('email', flat=True).iterator(chunk_size=10000))
+        allocator = UsernameAllocator(set(CustomUser.objects.values_list('username', flat=True).iterator(chunk_size=10000)))
+
+        started = time.monotonic()
+        processed = created = skipped = 0
+        batch = []
+        for record in records:
+            processed += 1
+            if processed <= done:
+                continue
+            email = CustomUser.objects.normalize_email(record['email'] or '')
+            if not email or email in emails:
+                skipped += 1
+            else:
+                emails.add(email)
+                batch.append(self.build_user(record, email, allocator))
+            if processed % batch_size == 0:
+                inserted, conflicts = self.insert(batch, allocator)
+                created, skipped = created + inserted, skipped + conflicts
+                batch = []
+                # Only now is every record up to here persisted or deliberately skipped
+                self.write_checkpoint(checkpoint, path, processed)
+                self.report(processed - done, created, skipped, started)
+        inserted, conflicts = self.insert(batch, allocator)
+        created, skipped = created + inserted, skipped + conflicts
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} user(s), skipped {skipped} (existing or without email) '
+            f'from {processed - done} record(s) in {elapsed:.1f}s.'
+        ))
+
+    def build_user(self, record, email, allocator):
+        first_name, _, last_name = record['name'].strip().partition(' ')
+        user = CustomUser(
+            username=allocator.allocate(CustomUser.objects.username_base(email)),
+            email=email,
+            first_name=first_name[:150],
+            last_name=last_name[:150],
+            is_active=not record['disabled'],
+            last_login=from_millis(record['last_signed_in_at']),
+            # Firebase handles authentication: an unusable password, as make_password(None) but cheaper
+            password=UNUSABLE_PASSWORD_PREFIX + secrets.token_urlsafe(30),
+        )
+        date_joined = from_millis(record['created_at'])
+        if date_joined is not None:
+            user.date_joined = date_joined
+        return user
+
+    def insert(self, users, allocator):
+        """Insert ``users``; return (created, skipped because the email was taken meanwhile)"""
+        skipped = 0
+        for _ in range(CustomUser.objects.SYNC_ATTEMPTS):
+            if not users:
+                return 0, skipped
+            try:
+                with transaction.atomic():
+                    CustomUser.objects.bulk_create(users)
+                return len(users), skipped
+            except IntegrityError:
+                # Someone signed up meanwhile: skip their emails, give the rest fresh usernames
+                emails = set(CustomUser.objects.filter(email__in=[user.email for user in users]).values_list('email', flat=True))
+                names = set(CustomUser.objects.filter(username__in=[user.username for user in users]).values_list('username', flat=True))
+                skipped += sum(user.email in emails for user in users)
+                users = [user for user in users if user.email not in emails]
+                allocator.taken.update(names)
+                for user in users:
+                    if user.username in names:
+                        user.username = allocator.allocate(CustomUser.objects.username_base(user.email))
+        raise CommandError(
+            f'Could not insert a batch of {len(users)} user(s) after {CustomUser.objects.SYNC_ATTEMPTS} attempts; '
+            'rerun the command to resume from the last checkpoint'
+        )
+
+    def read_checkpoint(self, checkpoint, path):
+        try:
+            with open(checkpoint) as progress:
+                data = json.load(progress)
+        except (OSError, ValueError):
+            return 0
+        if data.get('source') != os.path.abspath(path) or data.get('size') != os.path.getsize(path):
+            raise CommandError(f'{checkpoint} belongs to another export; remove it to start over')
+        return data.get('processed', 0)
+
+    def write_checkpoint(self, checkpoint, path, processed):
+        data = {'source': os.path.abspath(path), 'size': os.path.getsize(path), 'processed': processed}
+        temporary = f'{checkpoint}.tmp'
+        with open(temporary, 'w') as progress:
+            json.dump(data, progress)
+        os.replace(temporary, checkpoint)
+
+    def report(self, processed, created, skipped, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'{processed} record(s), {created} created, {skipped} skipped, {processed / elapsed:,.0f} records/s'
+        )
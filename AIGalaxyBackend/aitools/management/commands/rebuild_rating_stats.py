@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from aitools.models import AITool
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized rating stats and favorite_count columns on AITool from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tool_ids', nargs='*', type=int, help='Only rebuild these tool ids (default: all tools)')
+
+    def handle(self, *args, **options):
+        tools = AITool.objects.all()
+        if options['tool_ids']:
+            tools = tools.filter(pk__in=options['tool_ids'])
+        updated = tools.refresh_rating_stats()
+        tools.refresh_favorite_counts()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating and favorite stats for {updated} tool(s)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from aitools import related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related-posts index of every published blog post from scratch'
+
+    def handle(self, *args, **options):
+        stored = related.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} related-post link(s)."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from aitools import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over AI tools and their models'
+
+    def handle(self, *args, **options):
+        backend = search.get_backend()
+        if backend == 'fallback':
+            self.stdout.write(self.style.WARNING('No full-text index for this database engine; search uses icontains.'))
+            return
+        count = search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} tool(s) ({backend})."))
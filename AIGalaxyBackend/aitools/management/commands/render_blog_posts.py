@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from aitools import cache
+from aitools.models import BlogPost
+from aitools.rendering import content_hash
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the stored rendering artifacts (HTML, summary, reading time, outline, hash) of blog posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slugs', nargs='*', help='Only render these posts (default: all posts)')
+        parser.add_argument(
+            '--stale', action='store_true',
+            help='Skip posts whose stored content hash still matches their content'
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        posts = BlogPost.objects.only('id', 'content', 'excerpt', 'content_hash').order_by('pk')
+        if options['slugs']:
+            posts = posts.filter(slug__in=options['slugs'])
+
+        batch_size = options['batch_size']
+        batch, rendered, skipped = [], 0, 0
+        for post in posts.iterator(chunk_size=batch_size):
+            if options['stale'] and post.content_hash == content_hash(post.content):
+                skipped += 1
+                continue
+            post.render_content()
+            batch.append(post)
+            if len(batch) >= batch_size:
+                rendered += BlogPost.objects.bulk_update(batch, BlogPost.RENDERED_FIELDS)
+                batch = []
+        rendered += BlogPost.objects.bulk_update(batch, BlogPost.RENDERED_FIELDS)
+
+        if rendered:
+            # bulk_update sends no signals
+            cache.bump_version('blogpost')
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} post(s), skipped {skipped} unchanged."))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:30
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Round
+
+
+def backfill_rating_stats(apps, schema_editor):
+    AITool = apps.get_model('aitools', 'AITool')
+    ToolRating = apps.get_model('aitools', 'ToolRating')
+    ratings = ToolRating.objects.filter(tool=OuterRef('pk')).order_by().values('tool')
+    AITool.objects.update(
+        rating_count=Coalesce(Subquery(ratings.annotate(total=Count('id')).values('total')), 0),
+        rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0),
+        average_rating=Subquery(ratings.annotate(avg=Round(Avg('rating'), 2)).values('avg')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0017_blogpost_anonymous_likes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aitool',
+            name='average_rating',
+            field=models.FloatField(blank=True, editable=False, help_text='Average rating rounded to 2 decimals (maintained automatically)', null=True),
+        ),
+        migrations.AddField(
+            model_name='aitool',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of ratings (maintained automatically)'),
+        ),
+        migrations.AddField(
+            model_name='aitool',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Sum of all rating values (maintained automatically)'),
+        ),
+        migrations.RunPython(backfill_rating_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+from django.db import migrations
+
+# Frozen copy of the aitools.search schema as of this migration: later changes
+# to that module must not change what this migration does.
+SEARCH_TABLE = 'aitools_aitool_search'
+
+SQLITE_CREATE_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "name, model_names, description, features, how_it_works, tokenize = 'unicode61 remove_diacritics 2')",
+]
+SQLITE_INSERT_SQL = (
+    f"INSERT INTO {SEARCH_TABLE} (rowid, name, model_names, description, features, how_it_works) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+
+POSTGRES_CREATE_SQL = [
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+    "tool_id bigint PRIMARY KEY REFERENCES aitools_aitool (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)",
+]
+POSTGRES_INSERT_SQL = (
+    f"INSERT INTO {SEARCH_TABLE} (tool_id, document) VALUES (%s, "
+    "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B') || "
+    "setweight(to_tsvector('english', %s), 'C') || setweight(to_tsvector('english', %s), 'D') || "
+    "setweight(to_tsvector('english', %s), 'D')) ON CONFLICT (tool_id) DO NOTHING"
+)
+
+
+def tool_document(tool, model_names):
+    features = tool.features or []
+    if isinstance(features, (list, tuple)):
+        features = ' '.join(str(feature) for feature in features)
+    return (
+        tool.name or '',
+        ' '.join(model_names),
+        tool.description or '',
+        str(features),
+        tool.how_it_works or '',
+    )
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        create_sql, insert_sql = SQLITE_CREATE_SQL, SQLITE_INSERT_SQL
+    elif vendor == 'postgresql':
+        create_sql, insert_sql = POSTGRES_CREATE_SQL, POSTGRES_INSERT_SQL
+    else:
+        # Other engines search with icontains filtering
+        return
+    AITool = apps.get_model('aitools', 'AITool')
+    with schema_editor.connection.cursor() as cursor:
+        for sql in create_sql:
+            cursor.execute(sql)
+        for tool in AITool.objects.prefetch_related('models').iterator(chunk_size=500):
+            cursor.execute(insert_sql, [tool.pk, *tool_document(tool, [model.name for model in tool.models.all()])])
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0018_aitool_rating_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_favorite_counts(apps, schema_editor):
+    AITool = apps.get_model('aitools', 'AITool')
+    UserFavorite = apps.get_model('aitools', 'UserFavorite')
+    favorites = UserFavorite.objects.filter(tool=OuterRef('pk')).order_by().values('tool')
+    AITool.objects.update(
+        favorite_count=Coalesce(Subquery(favorites.annotate(total=Count('id')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0019_aitool_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aitool',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of users who favorited this tool (maintained automatically)'),
+        ),
+        migrations.RunPython(backfill_favorite_counts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='aitool',
+            index=models.Index(fields=['-created_at', '-id'], name='aitools_ait_created_d4f095_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aitool',
+            index=models.Index(fields=['is_popular', '-created_at'], name='aitools_ait_is_popu_43f355_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aitool',
+            index=models.Index(fields=['is_free', '-created_at'], name='aitools_ait_is_free_75354a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aitool',
+            index=models.Index(fields=['is_premium', '-created_at'], name='aitools_ait_is_prem_fe1a4b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aitool',
+            index=models.Index(fields=['category', '-created_at'], name='aitools_ait_categor_a14336_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aitool',
+            index=models.Index(fields=['-average_rating', '-rating_count'], name='aitools_ait_average_a7f7a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aitool',
+            index=models.Index(fields=['-favorite_count'], name='aitools_ait_favorit_91a5d3_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:35
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_published_at(apps, schema_editor):
+    BlogPost = apps.get_model('aitools', 'BlogPost')
+    BlogPost.objects.filter(status='PB', published_at__isnull=True).update(published_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0020_aitool_favorite_count_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='aiusage',
+            index=models.Index(fields=['-created_at', '-id'], name='aitools_aiu_created_722623_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['-published_at', '-id'], name='aitools_blo_publish_4eefe4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created_at', 'id'], name='aitools_com_created_2589c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='toolrating',
+            index=models.Index(fields=['-created_at', '-id'], name='aitools_too_created_109188_idx'),
+        ),
+    ]
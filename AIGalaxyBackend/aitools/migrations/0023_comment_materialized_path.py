@@ -0,0 +1,70 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+PATH_STEP = 10
+
+
+def backfill_comment_paths(apps, schema_editor):
+    Comment = apps.get_model('aitools', 'Comment')
+    parents = dict(Comment.objects.values_list('id', 'parent_id'))
+    positions = {}
+
+    def position(comment_id):
+        # Walk up to the first ancestor with a known position, then fill in on the way down
+        chain = []
+        while comment_id not in positions:
+            chain.append(comment_id)
+            comment_id = parents[comment_id]
+            if comment_id is None:
+                break
+        for current in reversed(chain):
+            parent_id = parents[current]
+            segment = str(current).zfill(PATH_STEP)
+            if parent_id is None:
+                positions[current] = (current, 0, segment)
+            else:
+                root_id, depth, path = positions[parent_id]
+                positions[current] = (root_id, depth + 1, path + segment)
+        return positions[chain[0]] if chain else positions[comment_id]
+
+    batch = []
+    for comment_id in parents:
+        root_id, depth, path = position(comment_id)
+        batch.append(Comment(id=comment_id, thread_root_id=root_id, depth=depth, path=path))
+    Comment.objects.bulk_update(batch, ['thread_root', 'depth', 'path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0022_updated_at_version_stamps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='thread_root',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_comments', to='aitools.comment'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['thread_root', 'path'], name='aitools_com_thread__23584f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['path'], name='aitools_com_path_45213b_idx'),
+        ),
+        migrations.RunPython(backfill_comment_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:46
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_like_counts(apps, schema_editor):
+    BlogPost = apps.get_model('aitools', 'BlogPost')
+    Like = BlogPost._meta.get_field('likes').remote_field.through
+    likes = Like.objects.filter(blogpost=OuterRef('pk')).order_by().values('blogpost')
+    BlogPost.objects.update(
+        like_count=Coalesce(Subquery(likes.annotate(total=Count('pk')).values('total')), 0) + F('anonymous_likes')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0023_comment_materialized_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Authenticated plus anonymous likes, kept in step with the likes table'),
+        ),
+        migrations.RunPython(backfill_like_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0024_blogpost_like_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='content_html',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Sanitized HTML of the content'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='outline',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Heading outline (table of contents)'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='reading_time',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Minutes'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='summary',
+            field=models.TextField(blank=True, default='', editable=False, help_text='Plain-text excerpt'),
+        ),
+        migrations.AddField(
+            model_name='blogpost',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # Existing posts keep an empty content_hash until rendered:
+        # run `manage.py render_blog_posts --stale` after migrating
+    ]
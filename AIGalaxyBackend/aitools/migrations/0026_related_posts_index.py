@@ -0,0 +1,89 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:49
+
+import re
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the aitools.related scoring as of this migration: later changes
+# to that module must not change what this migration does.
+RELATED_LIMIT = 10
+MIN_SCORE = 1.0
+TOOL_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+TERM_WEIGHT = 5.0
+
+TERM_RE = re.compile(r'[a-z0-9]{3,}')
+STOPWORDS = {
+    'and', 'are', 'but', 'can', 'for', 'from', 'has', 'have', 'how', 'into', 'its', 'more', 'not',
+    'our', 'out', 'that', 'the', 'their', 'them', 'this', 'was', 'what', 'when', 'which', 'who',
+    'why', 'will', 'with', 'you', 'your',
+}
+
+
+def terms(*texts):
+    return {
+        term for text in texts
+        for term in TERM_RE.findall((text or '').lower())
+        if term not in STOPWORDS
+    }
+
+
+def build_related_posts(apps, schema_editor):
+    BlogPost = apps.get_model('aitools', 'BlogPost')
+    RelatedPost = apps.get_model('aitools', 'RelatedPost')
+    categories, post_terms, tools = {}, {}, defaultdict(set)
+    for post_id, category, title, summary in BlogPost.objects.filter(status='PB').values_list(
+        'id', 'category_tag', 'title', 'summary'
+    ):
+        categories[post_id] = category or None
+        post_terms[post_id] = terms(title, summary)
+    for post_id, tool_id in BlogPost.tools_mentioned.through.objects.filter(blogpost__status='PB').values_list(
+        'blogpost_id', 'aitool_id'
+    ):
+        tools[post_id].add(tool_id)
+
+    def score(a, b):
+        value = TOOL_WEIGHT * len(tools[a] & tools[b])
+        if categories[a] and categories[a] == categories[b]:
+            value += CATEGORY_WEIGHT
+        union = post_terms[a] | post_terms[b]
+        if union:
+            value += TERM_WEIGHT * len(post_terms[a] & post_terms[b]) / len(union)
+        return round(value, 4)
+
+    rows = []
+    for post_id in post_terms:
+        scored = [(other, score(post_id, other)) for other in post_terms if other != post_id]
+        best = sorted(
+            [(other, value) for other, value in scored if value >= MIN_SCORE],
+            key=lambda pair: (-pair[1], -pair[0])
+        )
+        rows += [RelatedPost(post_id=post_id, related_id=other, score=value) for other, value in best[:RELATED_LIMIT]]
+    RelatedPost.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0025_blogpost_rendered_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='aitools.blogpost')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_from', to='aitools.blogpost')),
+            ],
+            options={
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['post', '-score'], name='aitools_rel_post_id_808145_idx')],
+                'unique_together': {('post', 'related')},
+            },
+        ),
+        migrations.RunPython(build_related_posts, migrations.RunPython.noop),
+    ]
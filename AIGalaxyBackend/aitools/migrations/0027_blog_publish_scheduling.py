@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0026_related_posts_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='blogpost',
+            name='aitools_blo_publish_c53cce_idx',
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['status', '-published_at', '-id'], name='aitools_blo_status_de405c_idx'),
+        ),
+    ]
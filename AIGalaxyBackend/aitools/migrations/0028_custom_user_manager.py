@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:00
+
+import aitools.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('aitools', '0027_blog_publish_scheduling'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='customuser',
+            managers=[
+                ('objects', aitools.models.CustomUserManager()),
+            ],
+        ),
+    ]
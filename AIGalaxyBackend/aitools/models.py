@@ -1,24 +1,97 @@
-from django.db import models
-from django.contrib.auth.models import AbstractUser
+from django.db import IntegrityError, models, transaction
+from django.db.models import Avg, Count, Exists, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Concat, Now, Round, Substr
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from django.utils.text import slugify
 
 
+class CustomUserManager(UserManager):
+    # Room left in username (max 150) for a numeric suffix
+    USERNAME_BASE_LENGTH = 140
+    SYNC_ATTEMPTS = 5
+
+    @classmethod
+    def username_base(cls, email, username=None):
+        """Requested username, or the email's local part, trimmed to leave room for a suffix"""
+        base = (username or email.split('@')[0]).strip()
+        return base[:cls.USERNAME_BASE_LENGTH] or 'user'
+
+    @staticmethod
+    def pick_username(base, taken):
+        """``base``, or ``base`` with the smallest numeric suffix not in ``taken``"""
+        if base not in taken:
+            return base
+        suffix = 1
+        while f'{base}{suffix}' in taken:
+            suffix += 1
+        return f'{base}{suffix}'
+
+    def free_username(self, base):
+        """A username no one has yet, from one query over the names starting with ``base``"""
+        return self.pick_username(base, set(self.filter(username__startswith=base).values_list('username', flat=True)))
+
+    def sync_firebase_user(self, email, username=None):
+        """
+        Get or create the user of a Firebase account, returning (user, created).
+
+        Concurrent first logins race on the unique email and username: the loser of
+        an insert re-reads and, if the email still has no user, picks another name.
+        Firebase handles authentication, so the password is unusable (no hashing).
+        """
+        email = self.normalize_email(email)
+        base = self.username_base(email, username)
+        for _ in range(self.SYNC_ATTEMPTS):
+            user = self.filter(email=email).first()
+            if user is not None:
+                return user, False
+            try:
+                with transaction.atomic():
+                    return self.create_user(username=self.free_username(base), email=email, password=None), True
+            except IntegrityError:
+                continue
+        raise IntegrityError(f'Could not allocate a username for {email}')
+
+
 class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     is_premium = models.BooleanField(default=False)
 
+    objects = CustomUserManager()
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
     def __str__(self):
         return self.email
 
+class CategoryQuerySet(models.QuerySet):
+    def with_tool_stats(self):
+        """Annotate tool counts and a popularity score in a single grouped query"""
+        return self.annotate(
+            tool_count=Count('tools'),
+            popular_tool_count=Count('tools', filter=Q(tools__is_popular=True)),
+            free_tool_count=Count('tools', filter=Q(tools__is_free=True)),
+            popularity_score=(
+                Count('tools', filter=Q(tools__is_popular=True)) * Category.POPULAR_TOOL_WEIGHT
+                + Coalesce(Sum('tools__favorite_count'), 0)
+                + Coalesce(Sum('tools__rating_count'), 0)
+            ),
+        )
+
+
 class Category(models.Model):
+    # Weight of one popular tool against one favorite/rating in popularity_score
+    POPULAR_TOOL_WEIGHT = 10
+
     name = models.CharField(max_length=100, unique=True,default='')
     slug = models.SlugField(max_length=100, unique=True,default='')
     description = models.TextField(blank=True, null=True,default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CategoryQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = "Categories"
@@ -27,12 +100,33 @@ class Category(models.Model):
         return self.name
 
 
+class AIToolQuerySet(models.QuerySet):
+    def refresh_rating_stats(self):
+        """Recompute the denormalized rating columns from ToolRating rows in a single UPDATE"""
+        ratings = ToolRating.objects.filter(tool=OuterRef('pk')).order_by().values('tool')
+        return self.update(
+            rating_count=Coalesce(Subquery(ratings.annotate(total=Count('id')).values('total')), 0),
+            rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating')).values('total')), 0),
+            average_rating=Subquery(ratings.annotate(avg=Round(Avg('rating'), 2)).values('avg')),
+            updated_at=Now(),
+        )
+
+    def refresh_favorite_counts(self):
+        """Recompute the denormalized favorite_count column from UserFavorite rows"""
+        favorites = UserFavorite.objects.filter(tool=OuterRef('pk')).order_by().values('tool')
+        return self.update(
+            favorite_count=Coalesce(Subquery(favorites.annotate(total=Count('id')).values('total')), 0),
+            updated_at=Now(),
+        )
+
+
 class AITool(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='tools',blank=True, null=True)
     name = models.CharField(max_length=100)
     description = models.TextField()
     is_premium = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     image = models.ImageField(upload_to='aitools', blank=True, null=True)
     is_popular =models.BooleanField(default=False)
     is_free = models.BooleanField(default=True)
@@ -40,6 +134,25 @@ class AITool(models.Model):
     affiliate = models.BooleanField(default=False, help_text='Whether this tool is an affiliate link')
     features = models.JSONField(blank=True, default=list, help_text='List of features as JSON array')
     how_it_works = models.TextField(blank=True, null=True, help_text='Description of how the tool works')
+    rating_count = models.PositiveIntegerField(default=0, editable=False, help_text='Number of ratings (maintained automatically)')
+    rating_sum = models.PositiveIntegerField(default=0, editable=False, help_text='Sum of all rating values (maintained automatically)')
+    average_rating = models.FloatField(blank=True, null=True, editable=False, help_text='Average rating rounded to 2 decimals (maintained automatically)')
+    favorite_count = models.PositiveIntegerField(default=0, editable=False, help_text='Number of users who favorited this tool (maintained automatically)')
+
+    objects = AIToolQuerySet.as_manager()
+
+    class Meta:
+        # Match the filter + ordering combinations served by AiToolViewSet
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['is_popular', '-created_at']),
+            models.Index(fields=['is_free', '-created_at']),
+            models.Index(fields=['is_premium', '-created_at']),
+            models.Index(fields=['category', '-created_at']),
+            models.Index(fields=['-average_rating', '-rating_count']),
+            models.Index(fields=['-favorite_count']),
+            models.Index(fields=['-updated_at']),
+        ]
 
     def __str__(self):
         return self.name
@@ -52,6 +165,11 @@ class AIUsage(models.Model):
     output_text = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.tool.name} at {self.created_at}"
 
@@ -124,10 +242,20 @@ class ToolRating(models.Model):
     class Meta:
         ordering = ['-created_at']
         unique_together = [('user', 'tool')]
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.tool.name} ({self.rating} stars)"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the original tool so moving a rating refreshes both tools' stats
+        instance._loaded_tool_id = instance.__dict__.get('tool_id')
+        return instance
+
 
 class UserFavorite(models.Model):
     """User's favorite AI tools"""
@@ -192,6 +320,38 @@ class ToolSubmission(models.Model):
         return f"{self.name} - {self.status}"
 
 
+class BlogPostQuerySet(models.QuerySet):
+    def published(self):
+        """Posts visible to readers: published, with a publication time that has come"""
+        return self.filter(status=BlogPost.Status.PUBLISHED, published_at__lte=timezone.now())
+
+    def with_engagement(self, user=None):
+        """
+        Annotate comment counts (and whether ``user`` liked each post) with
+        correlated subqueries, so serializers don't run a query per post.
+        Likes are counted in the like_count column.
+        """
+        comments = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post')
+        queryset = self.annotate(
+            comments_total=Coalesce(Subquery(comments.annotate(total=Count('pk')).values('total')), 0),
+            active_comments_total=Coalesce(
+                Subquery(comments.filter(active=True).annotate(total=Count('pk')).values('total')), 0
+            ),
+        )
+        if user is not None and user.is_authenticated:
+            queryset = queryset.annotate(
+                liked_by_viewer=Exists(BlogPost.likes.through.objects.filter(blogpost=OuterRef('pk'), customuser=user))
+            )
+        return queryset
+
+    def refresh_like_counts(self):
+        """Recount like_count from the likes table in a single UPDATE"""
+        likes = BlogPost.likes.through.objects.filter(blogpost=OuterRef('pk')).order_by().values('blogpost')
+        return self.update(
+            like_count=Coalesce(Subquery(likes.annotate(total=Count('pk')).values('total')), 0) + F('anonymous_likes')
+        )
+
+
 class BlogPost(models.Model):
     """Blog post model with SEO and engagement features"""
     class Status(models.TextChoices):
@@ -207,6 +367,13 @@ class BlogPost(models.Model):
         help_text="A short 'TL;DR' summary for the card view."
     )
     content = models.TextField(help_text='Main blog post content')
+    # Derived from content/excerpt by aitools.rendering whenever they are saved
+    content_html = models.TextField(blank=True, default='', editable=False, help_text='Sanitized HTML of the content')
+    summary = models.TextField(blank=True, default='', editable=False, help_text='Plain-text excerpt')
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveSmallIntegerField(default=0, editable=False, help_text='Minutes')
+    outline = models.JSONField(default=list, blank=True, editable=False, help_text='Heading outline (table of contents)')
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
     cover_image = models.ImageField(upload_to='blog_covers/', blank=True, null=True)
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -232,6 +399,11 @@ class BlogPost(models.Model):
         default=0,
         help_text='Number of likes from anonymous users'
     )
+    like_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Authenticated plus anonymous likes, kept in step with the likes table'
+    )
     view_count = models.PositiveIntegerField(
         default=0,
         help_text='Number of times this post has been viewed'
@@ -257,13 +429,22 @@ class BlogPost(models.Model):
         help_text='Keep under 160 chars. This appears in search results.'
     )
 
+    objects = BlogPostQuerySet.as_manager()
+
+    # Written only with F() updates; a full save() must not overwrite them with stale values
+    COUNTER_FIELDS = ('anonymous_likes', 'like_count', 'view_count')
+    RENDERED_FIELDS = ('content_html', 'summary', 'word_count', 'reading_time', 'outline', 'content_hash')
+
     class Meta:
         verbose_name = 'Blog Post'
         verbose_name_plural = 'Blog Posts'
         ordering = ['-published_at']
         indexes = [
             models.Index(fields=['slug', 'status']),
-            models.Index(fields=['published_at', 'status']),
+            # The feed: status = published AND published_at <= now ORDER BY published_at DESC, id DESC
+            models.Index(fields=['status', '-published_at', '-id']),
+            models.Index(fields=['-published_at', '-id']),
+            models.Index(fields=['-updated_at']),
         ]
 
     def __str__(self):
@@ -272,16 +453,140 @@ class BlogPost(models.Model):
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        if self.status == self.Status.PUBLISHED and not self.published_at:
+            # Feeds and keyset pagination order by published_at, so it must be set
+            self.published_at = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        deferred = self.get_deferred_fields()
+        sources = {'content', 'excerpt'}
+        if not sources & deferred and (update_fields is None or sources & set(update_fields)):
+            self.render_content()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields).union(self.RENDERED_FIELDS)
+        if not self._state.adding and update_fields is None and not kwargs.get('force_insert'):
+            skipped = deferred.union(self.COUNTER_FIELDS)
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
         super().save(*args, **kwargs)
 
+    def render_content(self):
+        """Recompute the stored rendering artifacts from content and excerpt"""
+        from .rendering import render_content
+
+        for field, value in render_content(self.content, self.excerpt).items():
+            setattr(self, field, value)
+
     def increment_view_count(self):
-        """Increment the view count for this post"""
-        self.view_count += 1
-        self.save(update_fields=['view_count'])
+        """Count a view; buffered and written in batches (see aitools.view_counts)"""
+        from .view_counts import view_count_buffer
+        view_count_buffer.add(self.pk)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember whether readers could see the post, so edits to hidden drafts keep the feed cache
+        if 'status' in field_names and 'published_at' in field_names:
+            instance._loaded_visible = instance.is_visible
+        return instance
+
+    @property
+    def is_visible(self):
+        """Published and not scheduled for later"""
+        return (
+            self.status == self.Status.PUBLISHED
+            and self.published_at is not None and self.published_at <= timezone.now()
+        )
+
+    @property
+    def current_view_count(self):
+        """Stored view count plus views still waiting in the write-behind buffer"""
+        from .view_counts import view_count_buffer
+        return self.view_count + view_count_buffer.pending(self.pk)
 
     def total_likes(self):
         """Get total number of likes (authenticated + anonymous)"""
-        return self.likes.count() + self.anonymous_likes
+        return self.like_count
+
+    def toggle_like(self, user):
+        """Like or unlike for ``user`` with a conditional delete-or-insert; returns whether it's now liked"""
+        from .viewer_state import bump_viewer_version
+
+        likes = BlogPost.likes.through.objects
+        with transaction.atomic():
+            transaction.on_commit(lambda: bump_viewer_version(user.pk))
+            removed, _ = likes.filter(blogpost_id=self.pk, customuser_id=user.pk).delete()
+            if removed:
+                self._adjust_likes(-removed)
+                return False
+            try:
+                with transaction.atomic():
+                    likes.create(blogpost_id=self.pk, customuser_id=user.pk)
+            except IntegrityError:
+                # A concurrent request inserted (and counted) the same like
+                self.refresh_from_db(fields=['like_count'])
+                return True
+            self._adjust_likes(1)
+            return True
+
+    def adjust_anonymous_likes(self, delta):
+        """Add (or with a negative delta remove) anonymous likes"""
+        with transaction.atomic():
+            self._adjust_likes(delta, anonymous=True)
+
+    def _adjust_likes(self, delta, anonymous=False):
+        from .cache import bump_version
+
+        counter = 'anonymous_likes' if anonymous else 'like_count'
+        updates = {'like_count': F('like_count') + delta}
+        if anonymous:
+            updates['anonymous_likes'] = F('anonymous_likes') + delta
+        queryset = BlogPost.objects.filter(pk=self.pk)
+        if delta < 0:
+            queryset = queryset.filter(**{f'{counter}__gte': -delta})
+        if queryset.update(**updates):
+            # Queryset updates send no signals, so invalidate cached blog responses here
+            transaction.on_commit(lambda: bump_version('blogpost'))
+        self.refresh_from_db(fields=['like_count', 'anonymous_likes'])
+
+
+class RelatedPost(models.Model):
+    """Precomputed similarity between two published posts (see aitools.related)"""
+    post = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='related_entries')
+    related = models.ForeignKey(BlogPost, on_delete=models.CASCADE, related_name='related_from')
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['-score']
+        unique_together = [('post', 'related')]
+        indexes = [
+            models.Index(fields=['post', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class CommentQuerySet(models.QuerySet):
+    @staticmethod
+    def branch_condition(comment, include_self=False):
+        """Q matching the comments below ``comment`` as one indexed range"""
+        if comment.depth == 0:
+            condition = Q(thread_root_id=comment.pk)
+            return condition if include_self else condition & Q(depth__gt=0)
+        lower, upper = comment.subtree_range()
+        condition = Q(path__gte=lower) if include_self else Q(path__gt=lower)
+        return condition & Q(path__lt=upper)
+
+    def in_subtrees(self, comments, include_self=False):
+        """Comments below any of ``comments``"""
+        condition = Q()
+        for comment in comments:
+            condition |= self.branch_condition(comment, include_self)
+        if not condition:
+            return self.none()
+        return self.filter(condition)
 
 
 class Comment(models.Model):
@@ -304,9 +609,27 @@ class Comment(models.Model):
         default=True,
         help_text='For moderation (hide instead of delete)'
     )
+    # Materialized path, maintained by save(): the zero-padded ids of the thread's
+    # comments from the root down to this one, so a branch is a single path range
+    thread_root = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=False,
+        related_name='thread_comments'
+    )
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    path = models.CharField(max_length=255, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CommentQuerySet.as_manager()
+
+    PATH_STEP = 10
+    MAX_DEPTH = 24  # 25 path segments fit in 255 characters
+
     class Meta:
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
@@ -314,11 +637,78 @@ class Comment(models.Model):
         indexes = [
             models.Index(fields=['post', 'active']),
             models.Index(fields=['parent']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['thread_root', 'path']),
+            models.Index(fields=['path']),
         ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the original parent so re-parenting moves the whole branch
+        instance._loaded_parent_id = instance.__dict__.get('parent_id')
+        return instance
+
+    @classmethod
+    def path_segment(cls, pk):
+        return str(pk).zfill(cls.PATH_STEP)
+
+    def subtree_range(self):
+        """(lower, upper) path bounds of this comment's branch, itself included"""
+        head, last = self.path[:-self.PATH_STEP], int(self.path[-self.PATH_STEP:])
+        return self.path, head + self.path_segment(last + 1)
+
+    def thread_position(self):
+        """The (thread_root_id, depth, path) this comment gets under its current parent"""
+        parent = self.parent
+        if parent is None:
+            return self.pk, 0, self.path_segment(self.pk)
+        return parent.thread_root_id, parent.depth + 1, parent.path + self.path_segment(self.pk)
+
+    def save(self, *args, **kwargs):
+        moved = (
+            not self._state.adding and self.path
+            and self.parent_id != getattr(self, '_loaded_parent_id', self.parent_id)
+        )
+        if moved and self.parent_id is not None and self.parent.path.startswith(self.path):
+            raise ValueError("A comment can't be moved below one of its own replies.")
+        if moved and self.parent_id is not None and self.parent.depth + 1 + self.branch_height() > self.MAX_DEPTH:
+            raise ValueError(f"Replies can't be nested more than {self.MAX_DEPTH} levels deep.")
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not self.path:
+                # The path ends with our own id, which only exists after the insert
+                self.thread_root_id, self.depth, self.path = self.thread_position()
+                Comment.objects.filter(pk=self.pk).update(
+                    thread_root_id=self.thread_root_id, depth=self.depth, path=self.path
+                )
+            elif moved:
+                self.move_branch()
+        self._loaded_parent_id = self.parent_id
+
+    def branch_height(self):
+        """Levels of replies below this comment (0 without replies)"""
+        deepest = Comment.objects.in_subtrees([self], include_self=True).aggregate(deepest=Max('depth'))['deepest']
+        return (deepest or self.depth) - self.depth
+
+    def move_branch(self):
+        """Rewrite the path, depth and root of this comment and its replies after a re-parent"""
+        old_path, old_depth = self.path, self.depth
+        lower, upper = self.subtree_range()
+        self.thread_root_id, self.depth, self.path = self.thread_position()
+        Comment.objects.filter(path__gte=lower, path__lt=upper).update(
+            path=Concat(Value(self.path), Substr('path', len(old_path) + 1), output_field=models.CharField()),
+            depth=F('depth') + (self.depth - old_depth),
+            thread_root_id=self.thread_root_id,
+        )
+
+    def get_descendant_count(self):
+        """Count active comments anywhere below this one"""
+        return Comment.objects.filter(active=True).in_subtrees([self]).count()
+
     def get_reply_count(self):
         """Get count of active replies"""
         return self.replies.filter(active=True).count()
@@ -326,6 +716,6 @@ class Comment(models.Model):
     @property
     def is_reply(self):
         """Check if this comment is a reply to another comment"""
-        return self.parent is not None
+        return self.parent_id is not None
 
 
@@ -0,0 +1,216 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import F, Q, QuerySet
+from django.db.models.expressions import OrderBy
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class StandardPagination(PageNumberPagination):
+    """Page number pagination honoring a client ?page_size= up to max_page_size"""
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a unique ordering such as ('-created_at', '-id').
+
+    Each page is fetched with ``WHERE (created_at, id) < (last_created_at, last_id)``
+    instead of COUNT + OFFSET, so deep pages cost the same as the first one and rows
+    inserted while a client scrolls never cause duplicates or skips.
+
+    Ordering terms are field or annotation names (``-`` for descending) or
+    ``F(name).asc()/.desc()``; the primary key is appended as a tiebreaker when
+    missing. Nullable keys sort NULLS LAST in both directions, so rows without a
+    value (e.g. drafts without published_at) come after the others instead of
+    being unreachable.
+    """
+    page_size = StandardPagination.page_size
+    page_size_query_param = 'page_size'
+    max_page_size = StandardPagination.max_page_size
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=('-created_at', '-id')):
+        self.ordering = tuple(ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.keys = self.get_keys(queryset)
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*[
+            (F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)) if nullable
+            else f"{'-' if descending else ''}{name}"
+            for name, descending, nullable, _, _ in self.keys
+        ])
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(position))
+        results = list(queryset[:page_size + 1])
+        has_next = len(results) > page_size
+        results = results[:page_size]
+        self.next_position = self.position_of(results[-1]) if has_next else None
+        return results
+
+    def get_keys(self, queryset):
+        """(name, descending, nullable, field, attribute) per ordering term, ending with the primary key"""
+        model = queryset.model
+        keys = []
+        for term in self.ordering:
+            if isinstance(term, str):
+                name, descending = term.lstrip('-'), term.startswith('-')
+            elif isinstance(term, OrderBy) and isinstance(term.expression, F):
+                name, descending = term.expression.name, term.descending
+            else:
+                raise ValidationError({'ordering': f'Cursor pagination cannot order by {term}.'})
+            if name == 'pk':
+                name = model._meta.pk.name
+            if name in queryset.query.annotations:
+                # An annotation's nullability isn't known: treat it as nullable
+                field = queryset.query.annotations[name].output_field
+                keys.append((name, descending, True, field, name))
+                continue
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise ValidationError({'ordering': f'Cursor pagination cannot order by {name}.'})
+            if not field.concrete or field.many_to_many or field.one_to_many:
+                raise ValidationError({'ordering': f'Cursor pagination cannot order by {name}.'})
+            keys.append((name, descending, field.null, field, field.attname))
+        pk = model._meta.pk
+        if pk.name not in [name for name, _, _, _, _ in keys]:
+            descending = keys[-1][1] if keys else False
+            keys.append((pk.name, descending, False, pk, pk.attname))
+        return keys
+
+    def seek_filter(self, position):
+        """Rows strictly after ``position`` in the key order (NULLs last)"""
+        condition = Q()
+        equal = Q()
+        for (name, descending, nullable, _, _), value in zip(self.keys, position):
+            if value is None:
+                # Only rows still NULL here can follow a NULL key
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            if nullable:
+                after |= Q(**{f'{name}__isnull': True})
+            condition |= equal & after
+            equal &= Q(**{name: value})
+        return condition
+
+    @staticmethod
+    def cursor_value(value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if hasattr(value, 'isoformat'):
+            # Full precision: the next page seeks on exactly this value
+            return value.isoformat()
+        return str(value)
+
+    def position_of(self, instance):
+        if not hasattr(self, 'keys'):
+            # Encoding a cursor outside paginate_queryset (e.g. a "more replies" link)
+            self.keys = self.get_keys(type(instance)._default_manager.all())
+        return [self.cursor_value(getattr(instance, attribute)) for _, _, _, _, attribute in self.keys]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if not isinstance(values, list) or len(values) != len(self.keys):
+                raise ValueError
+            return [self.decode_value(key, value) for key, value in zip(self.keys, values)]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def decode_value(key, value):
+        _, _, nullable, field, _ = key
+        # Older cursors carried NULL keys as '' (Field.value_to_string)
+        if value is None or (value == '' and not field.empty_strings_allowed):
+            if not nullable:
+                raise ValueError
+            return None
+        return field.to_python(value)
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class CursorPaginationMixin:
+    """
+    Opt-in keyset pagination for a viewset.
+
+    Clients sending ``?pagination=cursor`` (first page) or ``?cursor=`` (following
+    pages) get KeysetPagination over ``cursor_ordering``, or over the ordering they
+    picked with ``?ordering=``; others keep page numbers.
+    """
+    cursor_ordering = ('-created_at', '-id')
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('cursor') or params.get('pagination') == 'cursor':
+                self._paginator = KeysetPagination(self.get_cursor_ordering())
+            else:
+                return super().paginator
+        return self._paginator
+
+    def get_cursor_ordering(self):
+        """The OrderingFilter's ordering when the client chose one, else cursor_ordering"""
+        if self.request.query_params.get(api_settings.ORDERING_PARAM):
+            for backend in getattr(self, 'filter_backends', ()):
+                if issubclass(backend, OrderingFilter):
+                    ordering = backend().get_ordering(self.request, self.get_queryset(), self)
+                    if ordering:
+                        return ordering
+        return self.cursor_ordering
+
+    def paginate_queryset(self, queryset):
+        if isinstance(self.paginator, KeysetPagination) and not isinstance(queryset, QuerySet):
+            # Precomputed result lists (e.g. search ranks) have no keys to seek on: use page numbers
+            self._paginator = self.pagination_class()
+        return super().paginate_queryset(queryset)
@@ -0,0 +1,207 @@
+"""
+Related-posts index.
+
+Published posts are scored pairwise on shared ``tools_mentioned``, a shared
+``category_tag`` and term overlap between their titles and summaries, and the
+best RELATED_LIMIT matches of each post are stored as RelatedPost rows. The
+detail page then reads them with one indexed lookup on (post, -score).
+
+Candidates come from inverted indexes (tool, category, term -> posts), so a post
+is only scored against posts it shares something with. ``update_post`` refreshes
+one post when it is published, edited or unpublished (see aitools.signals),
+loading only that post and its candidates; ``rebuild_index`` recomputes
+everything (see the rebuild_related_posts command).
+Scheduled posts are indexed too; readers only see them once they are visible.
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+RELATED_LIMIT = 10
+MIN_SCORE = 1.0
+TOOL_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+TERM_WEIGHT = 5.0
+
+TERM_RE = re.compile(r'[a-z0-9]{3,}')
+STOPWORDS = {
+    'and', 'are', 'but', 'can', 'for', 'from', 'has', 'have', 'how', 'into', 'its', 'more', 'not',
+    'our', 'out', 'that', 'the', 'their', 'them', 'this', 'was', 'what', 'when', 'which', 'who',
+    'why', 'will', 'with', 'you', 'your',
+}
+
+
+def terms(*texts):
+    return {
+        term for text in texts
+        for term in TERM_RE.findall((text or '').lower())
+        if term not in STOPWORDS
+    }
+
+
+class PostFeatures:
+    """Tools, category and terms of every published post, with inverted indexes for candidate lookup"""
+
+    def __init__(self, posts, tool_links):
+        # posts: (id, category_tag, title, summary); tool_links: (post_id, tool_id)
+        self.categories = {}
+        self.terms = {}
+        self.tools = defaultdict(set)
+        self.by_category = defaultdict(set)
+        self.by_term = defaultdict(set)
+        self.by_tool = defaultdict(set)
+        for post_id, category, title, summary in posts:
+            self.categories[post_id] = category or None
+            self.terms[post_id] = terms(title, summary)
+            if category:
+                self.by_category[category].add(post_id)
+            for term in self.terms[post_id]:
+                self.by_term[term].add(post_id)
+        for post_id, tool_id in tool_links:
+            if post_id in self.terms:
+                self.tools[post_id].add(tool_id)
+                self.by_tool[tool_id].add(post_id)
+
+    @classmethod
+    def load(cls, BlogPost):
+        return cls(
+            BlogPost.objects.filter(status='PB').values_list('id', 'category_tag', 'title', 'summary'),
+            BlogPost.tools_mentioned.through.objects.filter(blogpost__status='PB')
+            .values_list('blogpost_id', 'aitool_id'),
+        )
+
+    @classmethod
+    def load_around(cls, BlogPost, post_id):
+        """Features of one published post and of the published posts sharing a tool, its category or a term with it"""
+        published = BlogPost.objects.filter(status='PB').order_by()
+        links = BlogPost.tools_mentioned.through.objects
+        post = published.filter(pk=post_id).values_list('id', 'category_tag', 'title', 'summary').first()
+        if post is None:
+            return cls([], [])
+        _, category, title, summary = post
+        shared = Q(pk=post_id) | Q(pk__in=links.filter(
+            aitool_id__in=links.filter(blogpost_id=post_id).values('aitool_id')
+        ).values('blogpost_id'))
+        if category:
+            shared |= Q(category_tag=category)
+        # Substring matches are a superset of term matches; scoring uses the exact terms
+        for term in terms(title, summary):
+            shared |= Q(title__icontains=term) | Q(summary__icontains=term)
+        candidates = published.filter(shared)
+        return cls(
+            candidates.values_list('id', 'category_tag', 'title', 'summary'),
+            links.filter(blogpost_id__in=candidates.values('id')).values_list('blogpost_id', 'aitool_id'),
+        )
+
+    def score(self, a, b):
+        score = TOOL_WEIGHT * len(self.tools[a] & self.tools[b])
+        if self.categories[a] and self.categories[a] == self.categories[b]:
+            score += CATEGORY_WEIGHT
+        union = self.terms[a] | self.terms[b]
+        if union:
+            score += TERM_WEIGHT * len(self.terms[a] & self.terms[b]) / len(union)
+        return round(score, 4)
+
+    def scores(self, post_id):
+        """(other_id, score) pairs at or above MIN_SCORE, best first"""
+        candidates = set(self.by_category.get(self.categories[post_id], ()))
+        for tool_id in self.tools[post_id]:
+            candidates |= self.by_tool[tool_id]
+        for term in self.terms[post_id]:
+            candidates |= self.by_term[term]
+        candidates.discard(post_id)
+        scored = [(other, self.score(post_id, other)) for other in candidates]
+        return sorted(
+            [(other, score) for other, score in scored if score >= MIN_SCORE],
+            key=lambda pair: (-pair[1], -pair[0])
+        )
+
+
+def rebuild_index(BlogPost=None, RelatedPost=None):
+    """
+    Recompute every post's related posts, returning the number of rows stored.
+    Migrations pass their historical models; everything else uses the app's.
+    """
+    if BlogPost is None:
+        from .models import BlogPost, RelatedPost
+
+    features = PostFeatures.load(BlogPost)
+    rows = [
+        RelatedPost(post_id=post_id, related_id=other, score=score)
+        for post_id in features.terms
+        for other, score in features.scores(post_id)[:RELATED_LIMIT]
+    ]
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        RelatedPost.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def update_post(post_id):
+    """
+    Refresh the related posts of one post and its place in other posts' lists.
+
+    Other posts gain this one if it now beats their weakest entry; full lists it
+    drops out of are recomputed so they keep RELATED_LIMIT entries.
+    """
+    from .models import BlogPost, RelatedPost
+
+    with transaction.atomic():
+        listed_in = set(RelatedPost.objects.filter(related_id=post_id).values_list('post_id', flat=True))
+        RelatedPost.objects.filter(Q(post_id=post_id) | Q(related_id=post_id)).delete()
+        features = PostFeatures.load_around(BlogPost, post_id)
+        rows = []
+        if post_id in features.terms:
+            rows = refresh_lists(RelatedPost, features, post_id)
+        # Lists that were full before losing this post have room for their next best match
+        regained = {row.post_id for row in rows if row.related_id == post_id}
+        dropped = listed_in - regained
+        if dropped:
+            short = (
+                RelatedPost.objects.filter(post_id__in=dropped).order_by()
+                .values('post_id').annotate(entries=Count('id')).filter(entries=RELATED_LIMIT - 1)
+                .values_list('post_id', flat=True)
+            )
+            for other in list(short):
+                rows += refill(BlogPost, RelatedPost, other)
+    return len(rows)
+
+
+def refresh_lists(RelatedPost, features, post_id):
+    """Store a post's related posts and add it to the lists it now belongs in"""
+    scores = features.scores(post_id)
+    rows = [
+        RelatedPost(post_id=post_id, related_id=other, score=score)
+        for other, score in scores[:RELATED_LIMIT]
+    ]
+    current = defaultdict(list)
+    for entry in RelatedPost.objects.filter(post_id__in=[other for other, _ in scores]).only('id', 'post_id', 'score'):
+        current[entry.post_id].append(entry)
+    evicted = []
+    for other, score in scores:
+        entries = current[other]
+        if len(entries) >= RELATED_LIMIT:
+            weakest = min(entries, key=lambda entry: entry.score)
+            if score <= weakest.score:
+                continue
+            evicted.append(weakest.pk)
+        rows.append(RelatedPost(post_id=other, related_id=post_id, score=score))
+    RelatedPost.objects.filter(pk__in=evicted).delete()
+    RelatedPost.objects.bulk_create(rows)
+    return rows
+
+
+def refill(BlogPost, RelatedPost, post_id):
+    """Recompute one post's own related posts from its candidates"""
+    features = PostFeatures.load_around(BlogPost, post_id)
+    if post_id not in features.terms:
+        return []
+    rows = [
+        RelatedPost(post_id=post_id, related_id=other, score=score)
+        for other, score in features.scores(post_id)[:RELATED_LIMIT]
+    ]
+    RelatedPost.objects.filter(post_id=post_id).delete()
+    RelatedPost.objects.bulk_create(rows)
+    return rows
@@ -0,0 +1,192 @@
+"""
+Derived artifacts of blog post content, computed once at save time.
+
+``render_content`` turns the stored ``content`` (HTML from the editor, or plain text)
+into sanitized HTML with heading anchors, the plain text, a word count, a reading
+time, a heading outline and a content hash. BlogPost.save() stores the results so
+the API and the share action never re-derive them per request.
+"""
+import hashlib
+import math
+import re
+from html import escape
+from html.parser import HTMLParser
+
+from django.utils.text import slugify
+
+WORDS_PER_MINUTE = 200
+SUMMARY_LENGTH = 200
+
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'code', 'div', 'em', 'figcaption', 'figure', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 's', 'span', 'strong', 'sub',
+    'sup', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+ALLOWED_SCHEMES = {'http', 'https', 'mailto'}
+# Elements dropped together with everything inside them
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript', 'svg', 'math'}
+VOID_TAGS = {'br', 'hr', 'img'}
+BLOCK_TAGS = {
+    'blockquote', 'br', 'div', 'figcaption', 'figure', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr',
+    'li', 'p', 'pre', 'td', 'th', 'tr',
+}
+OUTLINE_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4}
+
+TAG_RE = re.compile(r'<[a-zA-Z/!]')
+SCHEME_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+
+
+def content_hash(content):
+    return hashlib.sha256((content or '').encode('utf-8')).hexdigest()
+
+
+def is_safe_url(url):
+    # Browsers ignore whitespace and control characters inside the scheme
+    match = SCHEME_RE.match(re.sub(r'[\x00-\x20]', '', url))
+    return match is None or match.group(1).lower() in ALLOWED_SCHEMES
+
+
+class ContentRenderer(HTMLParser):
+    """Allowlist sanitizer that also collects the plain text and heading outline"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.text = []
+        self.outline = []
+        self.open_tags = []
+        self.dropped_depth = 0
+        self.heading = None
+        self.anchors = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropped_depth += 1
+            return
+        if self.dropped_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+            if self.heading is not None:
+                self.heading['text'].append(' ')
+        if tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRIBUTES.get(tag, set())
+        kept = [
+            (name, value) for name, value in attrs
+            if name in allowed and value is not None and (name not in URL_ATTRIBUTES or is_safe_url(value))
+        ]
+        if tag == 'a' and any(name == 'href' and value.startswith(('http:', 'https:')) for name, value in kept):
+            kept.append(('rel', 'noopener noreferrer'))
+        if tag in OUTLINE_TAGS and self.heading is None:
+            # The anchor id is filled in at the end tag, once the heading text is known
+            self.heading = {'level': OUTLINE_TAGS[tag], 'tag': tag, 'index': len(self.html), 'text': []}
+        rendered = ''.join(f' {name}="{escape(value)}"' for name, value in kept)
+        self.html.append(f'<{tag}{rendered}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropped_depth = max(self.dropped_depth - 1, 0)
+            return
+        if self.dropped_depth:
+            return
+        if tag in BLOCK_TAGS:
+            self.text.append(' ')
+        if tag not in self.open_tags:
+            return
+        # Close anything left open inside this element
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.html.append(f'</{open_tag}>')
+            if self.heading is not None and open_tag == self.heading['tag']:
+                self.finish_heading()
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropped_depth:
+            return
+        self.html.append(escape(data, quote=False))
+        self.text.append(data)
+        if self.heading is not None:
+            self.heading['text'].append(data)
+
+    def finish_heading(self):
+        heading, self.heading = self.heading, None
+        text = ' '.join(''.join(heading['text']).split())
+        if not text:
+            return
+        anchor = base = slugify(text) or 'section'
+        suffix = 2
+        while anchor in self.anchors:
+            anchor, suffix = f'{base}-{suffix}', suffix + 1
+        self.anchors.add(anchor)
+        self.html[heading['index']] = self.html[heading['index']].replace(
+            f"<{heading['tag']}", f"<{heading['tag']} id=\"{anchor}\"", 1
+        )
+        self.outline.append({'level': heading['level'], 'text': text, 'anchor': anchor})
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.handle_endtag(self.open_tags[-1])
+
+
+def plain_text_to_html(content):
+    paragraphs = [paragraph.strip() for paragraph in re.split(r'\n\s*\n', content) if paragraph.strip()]
+    return ''.join(
+        '<p>' + '<br>'.join(escape(line) for line in paragraph.splitlines()) + '</p>'
+        for paragraph in paragraphs
+    )
+
+
+def truncate_words(text, length=SUMMARY_LENGTH):
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(' ', 1)[0] or text[:length]
+    return cut.rstrip(' .,;:') + '...'
+
+
+def render_content(content, excerpt=''):
+    """Return the derived artifacts of a post's content as a dict of BlogPost field values"""
+    content = content or ''
+    source = content if TAG_RE.search(content) else plain_text_to_html(content)
+    renderer = ContentRenderer()
+    renderer.feed(source)
+    renderer.close()
+    text = ' '.join(''.join(renderer.text).split())
+    words = len(text.split())
+    return {
+        'content_html': ''.join(renderer.html),
+        'summary': summarize(excerpt) or truncate_words(text),
+        'word_count': words,
+        'reading_time': math.ceil(words / WORDS_PER_MINUTE),
+        'outline': renderer.outline,
+        'content_hash': content_hash(content),
+    }
+
+
+def summarize(excerpt):
+    """Plain text of a hand-written excerpt"""
+    if not excerpt:
+        return ''
+    if not TAG_RE.search(excerpt):
+        return ' '.join(excerpt.split())
+    renderer = ContentRenderer()
+    renderer.feed(excerpt)
+    renderer.close()
+    return ' '.join(''.join(renderer.text).split())
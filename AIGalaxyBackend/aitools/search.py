@@ -0,0 +1,172 @@
+"""
+Full-text search index over AI tools.
+
+SQLite uses an FTS5 virtual table keyed by tool id (rowid) and ranked with bm25;
+PostgreSQL uses a weighted tsvector table with a GIN index ranked with ts_rank.
+Other engines fall back to icontains filtering. The index is created by migration
+0019 and kept in sync by the AITool/ToolModel signals in aitools.signals.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+SEARCH_TABLE = 'aitools_aitool_search'
+MAX_RESULTS = 1000
+
+# Column weights: name > model names > description > features/how it works
+SQLITE_CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "name, model_names, description, features, how_it_works, tokenize = 'unicode61 remove_diacritics 2')"
+)
+SQLITE_RANK = f"bm25({SEARCH_TABLE}, 10.0, 5.0, 2.0, 1.0, 1.0)"
+
+POSTGRES_CREATE_SQL = [
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+    "tool_id bigint PRIMARY KEY REFERENCES aitools_aitool (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    "document tsvector NOT NULL)",
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING GIN (document)",
+]
+POSTGRES_DOCUMENT_SQL = (
+    "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B') || "
+    "setweight(to_tsvector('english', %s), 'C') || setweight(to_tsvector('english', %s), 'D') || "
+    "setweight(to_tsvector('english', %s), 'D')"
+)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_sqlite_index_available = {}
+
+
+def get_backend(conn=None):
+    """Return 'postgres', 'sqlite' or 'fallback' for the given connection"""
+    conn = conn or connection
+    if conn.vendor == 'postgresql':
+        return 'postgres'
+    if conn.vendor == 'sqlite':
+        name = str(conn.settings_dict['NAME'])
+        if name not in _sqlite_index_available:
+            _sqlite_index_available[name] = SEARCH_TABLE in conn.introspection.table_names()
+        if _sqlite_index_available[name]:
+            return 'sqlite'
+    return 'fallback'
+
+
+def create_index(conn):
+    """Create the search table for the connection's engine (no-op for other engines)"""
+    if conn.vendor == 'postgresql':
+        with conn.cursor() as cursor:
+            for sql in POSTGRES_CREATE_SQL:
+                cursor.execute(sql)
+    elif conn.vendor == 'sqlite':
+        with conn.cursor() as cursor:
+            cursor.execute(SQLITE_CREATE_SQL)
+        _sqlite_index_available.pop(str(conn.settings_dict['NAME']), None)
+
+
+def tool_document(tool, model_names=None):
+    """Return the (name, model_names, description, features, how_it_works) text of a tool"""
+    if model_names is None:
+        model_names = tool.models.values_list('name', flat=True)
+    features = tool.features or []
+    if isinstance(features, (list, tuple)):
+        features = ' '.join(str(feature) for feature in features)
+    return (
+        tool.name or '',
+        ' '.join(model_names),
+        tool.description or '',
+        str(features),
+        tool.how_it_works or '',
+    )
+
+
+def index_tool(tool, model_names=None):
+    """Insert or replace a tool's row in the search index"""
+    backend = get_backend()
+    if backend == 'fallback':
+        return
+    document = tool_document(tool, model_names)
+    with connection.cursor() as cursor:
+        if backend == 'sqlite':
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [tool.pk])
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, name, model_names, description, features, how_it_works) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                [tool.pk, *document]
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (tool_id, document) VALUES (%s, {POSTGRES_DOCUMENT_SQL}) "
+                "ON CONFLICT (tool_id) DO UPDATE SET document = EXCLUDED.document",
+                [tool.pk, *document]
+            )
+
+
+def remove_tool(tool_id):
+    """Drop a tool from the search index"""
+    backend = get_backend()
+    if backend == 'fallback':
+        return
+    column = 'rowid' if backend == 'sqlite' else 'tool_id'
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {column} = %s", [tool_id])
+
+
+def rebuild_index():
+    """Re-index every tool, returning the number of tools indexed"""
+    from .models import AITool
+
+    backend = get_backend()
+    if backend == 'fallback':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+    count = 0
+    for tool in AITool.objects.prefetch_related('models').iterator(chunk_size=500):
+        index_tool(tool, [model.name for model in tool.models.all()])
+        count += 1
+    return count
+
+
+def search_tool_ids(query, limit=MAX_RESULTS):
+    """
+    Return the ids of tools matching ``query``, best match first.
+
+    Every term must match and the last term is treated as a prefix,
+    so "chat gp" finds "ChatGPT" while the user is still typing.
+    """
+    terms = TOKEN_RE.findall(query.lower())
+    if not terms:
+        return []
+    backend = get_backend()
+    with connection.cursor() as cursor:
+        if backend == 'sqlite':
+            match = ' '.join(f'"{term}"' for term in terms[:-1])
+            match = f'{match} "{terms[-1]}"*'.strip()
+            cursor.execute(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+                f"ORDER BY {SQLITE_RANK} LIMIT %s",
+                [match, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+        if backend == 'postgres':
+            tsquery = ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+            cursor.execute(
+                f"SELECT tool_id FROM {SEARCH_TABLE}, to_tsquery('english', %s) query "
+                "WHERE document @@ query ORDER BY ts_rank(document, query) DESC, tool_id DESC LIMIT %s",
+                [tsquery, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    from .models import AITool
+
+    condition = Q()
+    for term in terms:
+        condition &= (
+            Q(name__icontains=term) | Q(description__icontains=term) |
+            Q(how_it_works__icontains=term) | Q(models__name__icontains=term)
+        )
+    return list(
+        AITool.objects.filter(condition).order_by('-is_popular', '-created_at')
+        .values_list('id', flat=True).distinct()[:limit]
+    )
@@ -0,0 +1,235 @@
+"""
+Sitemap, blog feeds and URL lists written to static files.
+
+Three sections are generated into SEO_FILES_ROOT, each from its own data:
+
+* posts: sitemap-posts-N.xml, blog.rss and blog.atom (visible blog posts)
+* tools: sitemap-tools-N.xml and tools.txt (AI tools)
+* categories: sitemap-categories-N.xml and categories.txt
+
+plus the sitemap.xml index over every shard (at most SITEMAP_SHARD_SIZE URLs each).
+
+manifest.json records the version counters (see aitools.cache) each section was
+built from, so ``refresh()`` only rebuilds sections whose data changed since, and
+files whose bytes didn't change are left untouched (same mtime, same Last-Modified).
+Writes schedule a debounced background refresh (see aitools.signals); the
+generate_seo_files command, run periodically, picks up scheduled posts going live.
+The files are static: the web server serves them, never a Django view.
+"""
+import json
+import os
+import threading
+from io import BytesIO, StringIO
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db import connection
+from django.utils import feedgenerator
+
+from .cache import get_versions
+
+SITEMAP_SHARD_SIZE = 50000
+FEED_ITEMS = 50
+SECTIONS = {
+    # section: version labels its files are built from
+    'posts': ('blogfeed',),
+    'tools': ('aitool',),
+    'categories': ('category',),
+}
+MANIFEST = 'manifest.json'
+
+
+def site_url(kind, **values):
+    path = settings.SITE_URL_PATTERNS[kind].format(**values)
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def file_url(name):
+    """Public URL of a generated file (SEO_FILES_URL is where they are mounted under SITE_URL)"""
+    return settings.SITE_URL.rstrip('/') + settings.SEO_FILES_URL + name
+
+
+def sitemap_xml(urls):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for loc, lastmod in urls:
+        lastmod = f'<lastmod>{lastmod.date().isoformat()}</lastmod>' if lastmod else ''
+        lines.append(f'<url><loc>{escape(loc)}</loc>{lastmod}</url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines) + '\n'
+
+
+class SeoFiles:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timer_lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def root(self):
+        return str(settings.SEO_FILES_ROOT)
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def read_manifest(self):
+        try:
+            with open(self.path(MANIFEST)) as manifest:
+                return json.load(manifest)
+        except (OSError, ValueError):
+            return {}
+
+    def write(self, name, content):
+        """Atomically write a file unless it already holds exactly ``content``; returns whether it changed"""
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        path = self.path(name)
+        try:
+            with open(path, 'rb') as existing:
+                if existing.read() == data:
+                    return False
+        except OSError:
+            pass
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as output:
+            output.write(data)
+        os.replace(temporary, path)
+        return True
+
+    def stale_sections(self, manifest=None):
+        manifest = self.read_manifest() if manifest is None else manifest
+        built = manifest.get('versions', {})
+        return [
+            section for section, labels in SECTIONS.items()
+            if built.get(section) != get_versions(*labels)
+        ]
+
+    def refresh(self, sections=None, force=False):
+        """Rebuild stale (or the given) sections and the sitemap index; returns the sections rebuilt"""
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            manifest = self.read_manifest()
+            if sections is None:
+                sections = list(SECTIONS) if force else self.stale_sections(manifest)
+            if not sections:
+                return []
+            versions = manifest.setdefault('versions', {})
+            shards = manifest.setdefault('shards', {})
+            for section in sections:
+                # Versions are read first: a write during the build leaves the section stale
+                versions[section] = get_versions(*SECTIONS[section])
+                shards[section] = getattr(self, f'build_{section}')(old_shards=shards.get(section, 0))
+            self.write_sitemap_index(shards)
+            self.write(MANIFEST, json.dumps(manifest, indent=2, sort_keys=True))
+            return sections
+
+    def write_sitemap_shards(self, section, urls, old_shards=0):
+        """Write ``urls`` as sitemap-<section>-N.xml shards, removing shards no longer needed"""
+        count, chunk = 0, []
+        for url in urls:
+            chunk.append(url)
+            if len(chunk) == SITEMAP_SHARD_SIZE:
+                count += 1
+                self.write(f'sitemap-{section}-{count}.xml', sitemap_xml(chunk))
+                chunk = []
+        if chunk or not count:
+            count += 1
+            self.write(f'sitemap-{section}-{count}.xml', sitemap_xml(chunk))
+        for stale in range(count + 1, old_shards + 1):
+            try:
+                os.remove(self.path(f'sitemap-{section}-{stale}.xml'))
+            except OSError:
+                pass
+        return count
+
+    def write_sitemap_index(self, shards):
+        lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+                 '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+        for section in SECTIONS:
+            for number in range(1, shards.get(section, 0) + 1):
+                lines.append(f'<sitemap><loc>{escape(file_url(f"sitemap-{section}-{number}.xml"))}</loc></sitemap>')
+        lines.append('</sitemapindex>')
+        self.write('sitemap.xml', '\n'.join(lines) + '\n')
+
+    def write_url_list(self, name, urls):
+        output = StringIO()
+        for loc, _ in urls:
+            output.write(loc + '\n')
+        self.write(name, output.getvalue())
+
+    def build_posts(self, old_shards=0):
+        from .models import BlogPost
+
+        posts = BlogPost.objects.published().order_by('-published_at', '-id')
+        urls = [
+            (site_url('post', slug=slug, id=post_id), updated_at)
+            for post_id, slug, updated_at in posts.values_list('id', 'slug', 'updated_at').iterator()
+        ]
+        shards = self.write_sitemap_shards('posts', urls, old_shards)
+
+        latest = list(posts.select_related('author').only(
+            'id', 'slug', 'title', 'summary', 'published_at', 'updated_at', 'category_tag', 'author__username'
+        )[:FEED_ITEMS])
+        feed_args = {
+            'title': 'AI Galaxy Blog',
+            'link': site_url('blog'),
+            'description': 'Latest posts',
+            'language': 'en',
+        }
+        for feed_class, name in ((feedgenerator.Rss201rev2Feed, 'blog.rss'), (feedgenerator.Atom1Feed, 'blog.atom')):
+            feed = feed_class(feed_url=file_url(name), **feed_args)
+            for post in latest:
+                link = site_url('post', slug=post.slug, id=post.id)
+                feed.add_item(
+                    title=post.title, link=link, unique_id=link, description=post.summary,
+                    pubdate=post.published_at, updateddate=post.updated_at,
+                    author_name=post.author.username,
+                    categories=[post.category_tag] if post.category_tag else None,
+                )
+            output = BytesIO()
+            feed.write(output, 'utf-8')
+            self.write(name, output.getvalue())
+        return shards
+
+    def build_tools(self, old_shards=0):
+        from .models import AITool
+
+        urls = [
+            (site_url('tool', id=tool_id), updated_at)
+            for tool_id, updated_at in AITool.objects.order_by('id').values_list('id', 'updated_at').iterator()
+        ]
+        self.write_url_list('tools.txt', urls)
+        return self.write_sitemap_shards('tools', urls, old_shards)
+
+    def build_categories(self, old_shards=0):
+        from .models import Category
+
+        urls = [
+            (site_url('category', slug=slug, id=category_id), updated_at)
+            for category_id, slug, updated_at in Category.objects.order_by('id').values_list('id', 'slug', 'updated_at')
+        ]
+        self.write_url_list('categories.txt', urls)
+        return self.write_sitemap_shards('categories', urls, old_shards)
+
+    def schedule_refresh(self):
+        """Refresh in the background after SEO_REFRESH_DELAY seconds, batching bursts of writes (0 = now)"""
+        delay = getattr(settings, 'SEO_REFRESH_DELAY', 30)
+        if not delay:
+            self.refresh()
+            return
+        with self._timer_lock:
+            if self._timer is None:
+                self._timer = threading.Timer(delay, self._refresh_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _refresh_in_background(self):
+        try:
+            with self._timer_lock:
+                self._timer = None
+            self.refresh()
+        finally:
+            # The timer thread has its own connection; don't leak it
+            connection.close()
+
+
+seo_files = SeoFiles()
@@ -1,10 +1,17 @@
+from collections import defaultdict
+from urllib.parse import urlencode, urljoin
+
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from django.contrib.auth import authenticate
+from django.db.models import Prefetch
 from .models import (
     CustomUser, AITool, AIUsage, Donation, Subscription, Category, ContactMessage,
     ToolModel, ToolRating, UserFavorite, NewsletterSubscriber, ToolSubmission,
     BlogPost, Comment
 )
+from .pagination import KeysetPagination
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -56,6 +63,17 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id','name', 'slug', 'description']
 
 
+class CategoryStatsSerializer(CategorySerializer):
+    """Category with tool counts annotated by Category.objects.with_tool_stats()"""
+    tool_count = serializers.IntegerField(read_only=True)
+    popular_tool_count = serializers.IntegerField(read_only=True)
+    free_tool_count = serializers.IntegerField(read_only=True)
+    popularity_score = serializers.IntegerField(read_only=True)
+
+    class Meta(CategorySerializer.Meta):
+        fields = CategorySerializer.Meta.fields + ['tool_count', 'popular_tool_count', 'free_tool_count', 'popularity_score']
+
+
 class ToolModelSerializer(serializers.ModelSerializer):
     class Meta:
         model = ToolModel
@@ -83,32 +101,117 @@ class AIToolSerializer(serializers.ModelSerializer):
     )
     models = ToolModelSerializer(many=True, read_only=True)
     ratings = ToolRatingSerializer(many=True, read_only=True)
-    average_rating = serializers.SerializerMethodField()
     user_rating = serializers.SerializerMethodField()
+    is_favorite = serializers.SerializerMethodField()
+
+    # Compact representation used by default on list endpoints (tool grid cards)
+    CARD_FIELDS = [
+        'id', 'name', 'description', 'category', 'image', 'is_premium', 'is_popular', 'is_free',
+        'affiliate', 'link', 'average_rating', 'rating_count', 'user_rating', 'is_favorite', 'created_at'
+    ]
+    # Related lookups needed to render each field without per-tool queries
+    QUERYSET_PLAN = {
+        'category': {'select_related': ['category']},
+        'models': {'prefetch_related': ['models']},
+        'ratings': {'prefetch_related': [Prefetch('ratings', queryset=ToolRating.objects.select_related('user'))]},
+    }
 
     class Meta:
         model = AITool
-        fields = ['id', 'name', 'description', 'category', 'category_id', 'image', 'is_premium', 'is_popular', 'is_free', 'affiliate', 'link', 'features', 'how_it_works', 'models', 'ratings', 'average_rating', 'user_rating', 'created_at']
-
-    def get_average_rating(self, obj):
-        ratings = obj.ratings.all()
-        if ratings.exists():
-            return round(sum(r.rating for r in ratings) / ratings.count(), 2)
-        return None
+        fields = ['id', 'name', 'description', 'category', 'category_id', 'image', 'is_premium', 'is_popular', 'is_free', 'affiliate', 'link', 'features', 'how_it_works', 'models', 'ratings', 'average_rating', 'rating_count', 'favorite_count', 'user_rating', 'is_favorite', 'created_at']
+        # Maintained from ToolRating/UserFavorite rows (see aitools.signals), never written by clients
+        read_only_fields = ['average_rating', 'rating_count', 'favorite_count']
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request, default=None):
+        """
+        Resolve which fields to render for a read request.
+
+        ``?view=full`` renders everything, ``?fields=a,b`` renders exactly those
+        fields and ``?expand=a,b`` adds fields on top of ``default`` (all fields when None).
+        """
+        def parse(param):
+            values = request.query_params.get(param, '')
+            return [name.strip() for name in values.split(',') if name.strip() in cls.Meta.fields]
+
+        if request.query_params.get('view') == 'full':
+            return list(cls.Meta.fields)
+        if request.query_params.get('fields'):
+            fields = parse('fields')
+        else:
+            fields = list(cls.Meta.fields if default is None else default)
+        fields += [name for name in parse('expand') if name not in fields]
+        return fields
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields):
+        """Apply the select_related/prefetch_related plan for the given fields"""
+        for name in fields:
+            plan = cls.QUERYSET_PLAN.get(name, {})
+            if plan.get('select_related'):
+                queryset = queryset.select_related(*plan['select_related'])
+            if plan.get('prefetch_related'):
+                queryset = queryset.prefetch_related(*plan['prefetch_related'])
+        return queryset
 
     def get_user_rating(self, obj):
+        # Batched by the view for the whole page (see tool_viewer_context)
+        user_ratings = self.context.get('user_ratings')
+        if user_ratings is not None:
+            rating = user_ratings.get(obj.id)
+        else:
+            request = self.context.get('request')
+            if not (request and request.user.is_authenticated):
+                return None
+            rating = obj.ratings.filter(user=request.user).first()
+        if rating is None:
+            return None
+        return {
+            'rating': rating.rating,
+            'review': rating.review,
+            'id': rating.id
+        }
+
+    def get_is_favorite(self, obj):
+        favorite_tool_ids = self.context.get('favorite_tool_ids')
+        if favorite_tool_ids is not None:
+            return obj.id in favorite_tool_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            try:
-                rating = obj.ratings.get(user=request.user)
-                return {
-                    'rating': rating.rating,
-                    'review': rating.review,
-                    'id': rating.id
-                }
-            except ToolRating.DoesNotExist:
-                return None
-        return None
+            return obj.favorited_by.filter(user=request.user).exists()
+        return False
+
+
+def tool_viewer_context(request, tools, fields=None):
+    """
+    Resolve the requesting user's ratings and favorites for a batch of tools.
+
+    Returns serializer context entries (``user_ratings`` and ``favorite_tool_ids``)
+    built with one query each, so AIToolSerializer doesn't query per tool.
+    """
+    if not (request and request.user.is_authenticated):
+        return {'user_ratings': {}, 'favorite_tool_ids': set()}
+    tool_ids = [tool.pk for tool in tools]
+    context = {}
+    if fields is None or 'user_rating' in fields:
+        context['user_ratings'] = {
+            rating.tool_id: rating
+            for rating in ToolRating.objects.filter(user=request.user, tool_id__in=tool_ids).only('id', 'tool_id', 'rating', 'review')
+        }
+    if fields is None or 'is_favorite' in fields:
+        context['favorite_tool_ids'] = set(
+            UserFavorite.objects.filter(user=request.user, tool_id__in=tool_ids).values_list('tool_id', flat=True)
+        )
+    return context
 
 
 # AIUsage Serializer
@@ -185,6 +288,36 @@ class ToolSubmissionCreateSerializer(serializers.ModelSerializer):
         fields = ['name', 'email', 'image', 'features', 'how_it_works']
 
 
+class CommentThread:
+    """
+    Active replies grouped by parent, loaded with a single query so
+    CommentSerializer can assemble whole threads (and reply counts) in memory.
+    """
+    ordering = ('created_at', 'id')
+
+    def __init__(self, replies):
+        self.children = defaultdict(list)
+        for reply in replies:
+            self.children[reply.parent_id].append(reply)
+
+    @classmethod
+    def for_comments(cls, comments):
+        """Every active reply below ``comments``, one path range per branch"""
+        return cls(
+            Comment.objects.filter(active=True).in_subtrees(comments)
+            .select_related('author').order_by(*cls.ordering)
+        )
+
+    def descendant_count(self, comment_id):
+        count = 0
+        stack = [comment_id]
+        while stack:
+            replies = self.children.get(stack.pop(), [])
+            count += len(replies)
+            stack.extend(reply.id for reply in replies)
+        return count
+
+
 class CommentSerializer(serializers.ModelSerializer):
     """Serializer for threaded comments"""
     author = UserSerializer(read_only=True)
@@ -196,22 +329,62 @@ class CommentSerializer(serializers.ModelSerializer):
     )
     replies = serializers.SerializerMethodField()
     reply_count = serializers.SerializerMethodField()
+    descendant_count = serializers.SerializerMethodField()
+    more_replies = serializers.SerializerMethodField()
     is_reply = serializers.SerializerMethodField()
 
+    DEFAULT_MAX_DEPTH = 3
+    DEFAULT_REPLIES_LIMIT = 10
+
     class Meta:
         model = Comment
         fields = ['id', 'post', 'author', 'author_id', 'body', 'parent', 'active',
-                  'created_at', 'updated_at', 'replies', 'reply_count', 'is_reply']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+                  'created_at', 'updated_at', 'replies', 'reply_count', 'descendant_count',
+                  'more_replies', 'is_reply', 'thread_root', 'depth']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'thread_root', 'depth']
+
+    # With a CommentThread in context ('thread'), replies are taken from memory up to
+    # 'max_depth' levels and 'replies_limit' per comment; otherwise they are queried.
+
+    def _inlined_replies(self, obj):
+        replies = self.context['thread'].children.get(obj.id, [])
+        if self.context.get('depth', 0) >= self.context.get('max_depth', self.DEFAULT_MAX_DEPTH):
+            return replies, []
+        return replies, replies[:self.context.get('replies_limit', self.DEFAULT_REPLIES_LIMIT)]
 
     def get_replies(self, obj):
         """Get active replies to this comment"""
-        replies = obj.replies.filter(active=True).order_by('created_at')
-        return CommentSerializer(replies, many=True, context=self.context).data
+        if 'thread' in self.context:
+            replies = self._inlined_replies(obj)[1]
+            context = dict(self.context, depth=self.context.get('depth', 0) + 1)
+        else:
+            replies = obj.replies.filter(active=True).order_by('created_at')
+            context = self.context
+        return CommentSerializer(replies, many=True, context=context).data
 
     def get_reply_count(self, obj):
+        if 'thread' in self.context:
+            return len(self.context['thread'].children.get(obj.id, []))
         return obj.get_reply_count()
 
+    def get_descendant_count(self, obj):
+        if 'thread' in self.context:
+            return self.context['thread'].descendant_count(obj.id)
+        return obj.get_descendant_count()
+
+    def get_more_replies(self, obj):
+        """URL loading the replies that weren't inlined (depth or per-comment limit reached)"""
+        if 'thread' not in self.context:
+            return None
+        replies, inlined = self._inlined_replies(obj)
+        if len(inlined) >= len(replies):
+            return None
+        params = {'post': obj.post_id, 'parent': obj.id, 'pagination': 'cursor'}
+        if inlined:
+            paginator = KeysetPagination(CommentThread.ordering)
+            params['cursor'] = paginator.encode_cursor(paginator.position_of(inlined[-1]))
+        return reverse('comments-list', request=self.context.get('request')) + '?' + urlencode(params)
+
     def get_is_reply(self, obj):
         return obj.is_reply
 
@@ -220,6 +393,13 @@ class CommentSerializer(serializers.ModelSerializer):
         post = self.initial_data.get('post')
         if value and post and value.post_id != post:
             raise serializers.ValidationError("Parent comment must belong to the same post.")
+        moving = self.instance is not None and bool(self.instance.path)
+        if value and moving and value.path.startswith(self.instance.path):
+            raise serializers.ValidationError("A comment can't be moved below one of its own replies.")
+        # A moved comment takes its replies along
+        height = self.instance.branch_height() if moving else 0
+        if value and value.depth + height >= Comment.MAX_DEPTH:
+            raise serializers.ValidationError(f"Replies can't be nested more than {Comment.MAX_DEPTH} levels deep.")
         return value
 
 
@@ -241,32 +421,87 @@ class BlogPostSerializer(serializers.ModelSerializer):
         required=False
     )
     comments = CommentSerializer(many=True, read_only=True)
-    like_count = serializers.SerializerMethodField()
     comment_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     active_comment_count = serializers.SerializerMethodField()
+    view_count = serializers.IntegerField(source='current_view_count', read_only=True)
 
     class Meta:
         model = BlogPost
         fields = [
-            'id', 'title', 'slug', 'excerpt', 'content', 'cover_image', 'author', 'author_id',
+            'id', 'title', 'slug', 'excerpt', 'content', 'content_html', 'summary', 'word_count',
+            'reading_time', 'outline', 'content_hash', 'cover_image', 'author', 'author_id',
             'status', 'published_at', 'created_at', 'updated_at', 'tools_mentioned', 'tools_mentioned_ids',
             'meta_title', 'meta_description', 'view_count', 'featured', 'category_tag',
             'comments', 'like_count', 'comment_count', 'active_comment_count', 'is_liked'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'slug', 'view_count']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'slug', 'view_count', 'like_count']
 
-    def get_like_count(self, obj):
-        return obj.total_likes()
+    # Counts come from BlogPost.objects.with_engagement() annotations when available
 
     def get_comment_count(self, obj):
+        if hasattr(obj, 'comments_total'):
+            return obj.comments_total
         return obj.comments.count()
 
     def get_active_comment_count(self, obj):
+        if hasattr(obj, 'active_comments_total'):
+            return obj.active_comments_total
         return obj.comments.filter(active=True).count()
 
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            if hasattr(obj, 'liked_by_viewer'):
+                return obj.liked_by_viewer
             return obj.likes.filter(id=request.user.id).exists()
         return False
+
+
+class RelatedBlogPostSerializer(serializers.ModelSerializer):
+    """Compact card for related-post lists; ``similarity`` is set when read from the related-posts index"""
+    excerpt = serializers.CharField(source='summary', read_only=True)
+    similarity = serializers.SerializerMethodField()
+
+    # Model columns the card reads, for .only()
+    MODEL_FIELDS = ('id', 'title', 'slug', 'summary', 'cover_image', 'published_at', 'category_tag', 'reading_time')
+
+    class Meta:
+        model = BlogPost
+        fields = ['id', 'title', 'slug', 'excerpt', 'cover_image', 'published_at', 'category_tag',
+                  'reading_time', 'similarity']
+        read_only_fields = fields
+
+    def get_similarity(self, obj):
+        return getattr(obj, 'similarity', None)
+
+
+class BlogPostListSerializer(BlogPostSerializer):
+    """Summary representation for the blog index: no content, comments or nested tools"""
+    excerpt = serializers.CharField(source='summary', read_only=True)
+
+    class Meta(BlogPostSerializer.Meta):
+        fields = [
+            'id', 'title', 'slug', 'excerpt', 'cover_image', 'author', 'status', 'published_at',
+            'featured', 'category_tag', 'reading_time', 'view_count', 'like_count', 'comment_count',
+            'active_comment_count', 'is_liked'
+        ]
+
+
+class BlogFeedSerializer(BlogPostListSerializer):
+    """Cards of the cached blog home feed: nothing per-viewer or fast-moving like counters"""
+    view_count = None
+    comment_count = None
+    active_comment_count = None
+    is_liked = None
+    cover_image = serializers.SerializerMethodField()
+
+    class Meta(BlogPostListSerializer.Meta):
+        fields = [
+            'id', 'title', 'slug', 'excerpt', 'cover_image', 'author', 'published_at',
+            'featured', 'category_tag', 'reading_time'
+        ]
+
+    def get_cover_image(self, obj):
+        # From API_URL, not the request: one cached feed serves every host
+        return urljoin(settings.API_URL, obj.cover_image.url) if obj.cover_image else None
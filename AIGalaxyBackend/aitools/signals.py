@@ -0,0 +1,221 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import cache, related, search
+from .authentication import user_cache
+from .seo_files import seo_files
+from .models import (
+    AITool, BlogPost, Category, Comment, CustomUser, Subscription, ToolModel, ToolRating, UserFavorite,
+)
+from .viewer_state import bump_viewer_version
+
+
+@receiver(post_save, sender=ToolRating)
+def refresh_tool_rating_stats_on_save(sender, instance, **kwargs):
+    """Keep AITool.rating_count/rating_sum/average_rating in sync when a rating is saved"""
+    tool_ids = {instance.tool_id, getattr(instance, '_loaded_tool_id', None)} - {None}
+    AITool.objects.filter(pk__in=tool_ids).refresh_rating_stats()
+    instance._loaded_tool_id = instance.tool_id
+
+
+@receiver(post_delete, sender=ToolRating)
+def refresh_tool_rating_stats_on_delete(sender, instance, **kwargs):
+    """Keep AITool rating stats in sync when a rating is deleted"""
+    AITool.objects.filter(pk=instance.tool_id).refresh_rating_stats()
+
+
+@receiver(post_save, sender=UserFavorite)
+def increment_tool_favorite_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AITool.objects.filter(pk=instance.tool_id).update(favorite_count=F('favorite_count') + 1, updated_at=Now())
+
+
+@receiver(post_delete, sender=UserFavorite)
+def decrement_tool_favorite_count(sender, instance, **kwargs):
+    AITool.objects.filter(pk=instance.tool_id, favorite_count__gt=0).update(favorite_count=F('favorite_count') - 1, updated_at=Now())
+
+
+@receiver(post_save, sender=AITool)
+def index_tool_on_save(sender, instance, raw=False, **kwargs):
+    """Keep the full-text search index in sync with tool edits"""
+    if not raw:
+        search.index_tool(instance)
+
+
+@receiver(post_delete, sender=AITool)
+def remove_tool_from_index(sender, instance, **kwargs):
+    search.remove_tool(instance.pk)
+
+
+@receiver(post_save, sender=ToolModel)
+@receiver(post_delete, sender=ToolModel)
+def reindex_tool_on_model_change(sender, instance, **kwargs):
+    """ToolModel names are part of the tool's search document"""
+    if kwargs.get('raw'):
+        return
+    tool = AITool.objects.filter(pk=instance.tool_id).first()
+    if tool is not None:
+        search.index_tool(tool)
+
+
+@receiver(post_save, sender=AITool)
+@receiver(post_delete, sender=AITool)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ToolModel)
+@receiver(post_delete, sender=ToolModel)
+@receiver(post_save, sender=ToolRating)
+@receiver(post_delete, sender=ToolRating)
+@receiver(post_save, sender=UserFavorite)
+@receiver(post_delete, sender=UserFavorite)
+def bump_response_cache_version(sender, **kwargs):
+    """Invalidate cached catalog responses that depend on the written model"""
+    cache.bump_version(sender._meta.model_name)
+
+
+@receiver(m2m_changed, sender=BlogPost.likes.through)
+def refresh_blog_like_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """Recount like_count after likes change through the m2m manager (admin, add/remove/clear)"""
+    if action == 'pre_clear' and reverse:
+        instance._cleared_blog_like_ids = list(instance.blog_likes.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        post_ids = [instance.pk]
+    elif action == 'post_clear':
+        post_ids = instance.__dict__.pop('_cleared_blog_like_ids', [])
+    else:
+        post_ids = pk_set
+    BlogPost.objects.filter(pk__in=post_ids).refresh_like_counts()
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def forget_cached_user(sender, instance, **kwargs):
+    """Token requests in this process see user edits (deactivation, staff changes) immediately"""
+    user_cache.discard(instance.pk)
+
+
+@receiver(post_save, sender=UserFavorite)
+@receiver(post_delete, sender=UserFavorite)
+@receiver(post_save, sender=ToolRating)
+@receiver(post_delete, sender=ToolRating)
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def bump_viewer_version_on_write(sender, instance, **kwargs):
+    """Rebuild the owner's cached bootstrap state (aitools.viewer_state) on their next call"""
+    bump_viewer_version(instance.user_id)
+
+
+@receiver(post_save, sender=CustomUser)
+def bump_viewer_version_on_profile_change(sender, instance, **kwargs):
+    bump_viewer_version(instance.pk)
+
+
+@receiver(m2m_changed, sender=BlogPost.likes.through)
+def bump_viewer_versions_on_likes_change(sender, instance, action, reverse, pk_set, **kwargs):
+    # BlogPost.toggle_like writes the through table directly and bumps the version itself
+    if action == 'pre_clear' and not reverse:
+        instance._cleared_like_user_ids = list(instance.likes.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        user_ids = [instance.pk]
+    elif action == 'post_clear':
+        user_ids = instance.__dict__.pop('_cleared_like_user_ids', [])
+    else:
+        user_ids = pk_set
+    for user_id in user_ids:
+        bump_viewer_version(user_id)
+
+
+@receiver(pre_delete, sender=CustomUser)
+def remember_liked_posts(sender, instance, **kwargs):
+    # The cascade removes the user's likes without m2m signals
+    instance._liked_post_ids = list(instance.blog_likes.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=CustomUser)
+def refresh_liked_posts(sender, instance, **kwargs):
+    post_ids = instance.__dict__.pop('_liked_post_ids', [])
+    if post_ids:
+        BlogPost.objects.filter(pk__in=post_ids).refresh_like_counts()
+        cache.bump_version('blogpost')
+
+
+RELATED_POST_FIELDS = {'status', 'title', 'excerpt', 'content', 'summary', 'category_tag'}
+
+
+@receiver(post_save, sender=BlogPost)
+def refresh_related_posts_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Re-score a post in the related-posts index once its publication or text change is committed"""
+    if raw or (update_fields and not RELATED_POST_FIELDS & set(update_fields)):
+        return
+    transaction.on_commit(lambda: related.update_post(instance.pk))
+
+
+@receiver(m2m_changed, sender=BlogPost.tools_mentioned.through)
+def refresh_related_posts_on_tools_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_blog_mention_ids = list(instance.blog_mentions.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        post_ids = [instance.pk]
+    elif action == 'post_clear':
+        post_ids = instance.__dict__.pop('_cleared_blog_mention_ids', [])
+    else:
+        post_ids = list(pk_set)
+    for post_id in post_ids:
+        transaction.on_commit(lambda post_id=post_id: related.update_post(post_id))
+
+
+@receiver(post_save, sender=BlogPost)
+def bump_blog_version_on_save(sender, instance, created=False, update_fields=None, **kwargs):
+    # Counters alone don't invalidate cached/conditional blog responses
+    if update_fields and set(update_fields) <= set(BlogPost.COUNTER_FIELDS):
+        return
+    cache.bump_version('blogpost')
+    # The home feed only changes when a visible post is edited, hidden or goes live
+    was_visible = False if created else getattr(instance, '_loaded_visible', True)
+    if instance.is_visible or was_visible:
+        cache.bump_version('blogfeed')
+    instance._loaded_visible = instance.is_visible
+    if instance.status == BlogPost.Status.PUBLISHED and instance.published_at and not instance.is_visible:
+        # Nothing is written when a scheduled post goes live, so invalidate at its publication time
+        cache.schedule_bump('blogpost', instance.published_at)
+        cache.schedule_bump('blogfeed', instance.published_at)
+
+
+@receiver(post_delete, sender=BlogPost)
+def bump_blog_versions_on_delete(sender, **kwargs):
+    cache.bump_version('blogpost')
+    cache.bump_version('blogfeed')
+
+
+@receiver(m2m_changed, sender=BlogPost.likes.through)
+@receiver(m2m_changed, sender=BlogPost.tools_mentioned.through)
+def bump_blog_version(sender, **kwargs):
+    if kwargs.get('action', 'post_').startswith('post_'):
+        cache.bump_version('blogpost')
+
+
+@receiver(post_save, sender=AITool)
+@receiver(post_delete, sender=AITool)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=BlogPost)
+@receiver(post_delete, sender=BlogPost)
+def schedule_seo_files_refresh(sender, raw=False, **kwargs):
+    """Regenerate sitemaps/feeds after catalog or blog writes; only changed sections are rebuilt"""
+    if not raw:
+        transaction.on_commit(seo_files.schedule_refresh)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_version(sender, **kwargs):
+    cache.bump_version('comment')
@@ -1,3 +1,994 @@
-from django.test import TestCase
+import base64
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Max
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import firebase_auth
+from .authentication import user_cache
+from .autocomplete import TypeaheadIndex
+from .cache import BUMPED_KEY, VERSION_KEY
+from .management.commands.import_firebase_users import Command as ImportFirebaseUsers, UsernameAllocator
+from .models import (
+    AITool, BlogPost, Category, Comment, CustomUser, CustomUserManager, RelatedPost, Subscription, ToolModel,
+    ToolRating, UserFavorite,
+)
+from .pagination import StandardPagination
+from .related import RELATED_LIMIT, rebuild_index, update_post
+from .rendering import render_content
+from .serializers import AIToolSerializer, BlogPostListSerializer
+from .view_counts import view_count_buffer
+
+
+def collect(client, url):
+    """Ids of every item reached by following ``next`` links from ``url``"""
+    ids = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+        data = response.json()
+        ids += [item['id'] for item in data['results']]
+        url = data['next']
+    return ids
+
+
+class ToolAggregateTests(TestCase):
+    def setUp(self):
+        self.tool = AITool.objects.create(name='Writer', description='Writes')
+        self.users = [
+            CustomUser.objects.create_user(username=f'user{i}', email=f'user{i}@example.com') for i in range(3)
+        ]
+
+    def stats(self, tool=None):
+        tool = AITool.objects.get(pk=(tool or self.tool).pk)
+        return tool.rating_count, tool.rating_sum, tool.average_rating
+
+    def test_ratings_keep_the_aggregates(self):
+        first = ToolRating.objects.create(user=self.users[0], tool=self.tool, rating=5)
+        ToolRating.objects.create(user=self.users[1], tool=self.tool, rating=4)
+        ToolRating.objects.create(user=self.users[2], tool=self.tool, rating=4)
+        self.assertEqual(self.stats(), (3, 13, 4.33))
+        first.rating = 1
+        first.save()
+        self.assertEqual(self.stats(), (3, 9, 3.0))
+        first.delete()
+        self.assertEqual(self.stats(), (2, 8, 4.0))
+        ToolRating.objects.all().delete()
+        self.assertEqual(self.stats(), (0, 0, None))
+
+    def test_moving_a_rating_updates_both_tools(self):
+        other = AITool.objects.create(name='Painter', description='Paints')
+        rating = ToolRating.objects.create(user=self.users[0], tool=self.tool, rating=2)
+        rating = ToolRating.objects.get(pk=rating.pk)
+        rating.tool = other
+        rating.save()
+        self.assertEqual(self.stats(), (0, 0, None))
+        self.assertEqual(self.stats(other), (1, 2, 2.0))
+
+    def test_favorites_keep_the_count(self):
+        favorites = [UserFavorite.objects.create(user=user, tool=self.tool) for user in self.users]
+        self.assertEqual(AITool.objects.get(pk=self.tool.pk).favorite_count, 3)
+        favorites[0].delete()
+        self.assertEqual(AITool.objects.get(pk=self.tool.pk).favorite_count, 2)
+
+    def test_rebuild_command_repairs_drift(self):
+        ToolRating.objects.create(user=self.users[0], tool=self.tool, rating=3)
+        UserFavorite.objects.create(user=self.users[0], tool=self.tool)
+        AITool.objects.filter(pk=self.tool.pk).update(rating_count=7, rating_sum=1, average_rating=1, favorite_count=0)
+        call_command('rebuild_rating_stats', stdout=StringIO())
+        self.assertEqual(self.stats(), (1, 3, 3.0))
+        self.assertEqual(AITool.objects.get(pk=self.tool.pk).favorite_count, 1)
+
+    def test_list_reads_the_columns(self):
+        ToolRating.objects.create(user=self.users[0], tool=self.tool, rating=4)
+        response = APIClient().get('/api/ai-tools/')
+        tool = response.json()['results'][0]
+        self.assertEqual((tool['average_rating'], tool['rating_count']), (4.0, 1))
+
+
+class ToolFieldsTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Writing', slug='writing')
+        self.user = CustomUser.objects.create_user(username='critic', email='critic@example.com')
+        self.client = APIClient()
+
+    def add_tools(self, count):
+        for i in range(count):
+            tool = AITool.objects.create(name=f'Tool {i}', description='Does things', category=self.category)
+            ToolModel.objects.create(tool=tool, name=f'Model {i}')
+            ToolRating.objects.create(user=self.user, tool=tool, rating=4, review='Good')
+
+    def test_list_renders_cards(self):
+        self.add_tools(1)
+        tool = self.client.get('/api/ai-tools/').json()['results'][0]
+        self.assertEqual(set(tool), set(AIToolSerializer.CARD_FIELDS))
+        self.assertEqual(tool['category']['slug'], 'writing')
+
+    def test_fields_and_expand(self):
+        self.add_tools(1)
+        tool = self.client.get('/api/ai-tools/?fields=id,name,bogus').json()['results'][0]
+        self.assertEqual(set(tool), {'id', 'name'})
+        tool = self.client.get('/api/ai-tools/?expand=models,ratings').json()['results'][0]
+        self.assertEqual(set(tool), set(AIToolSerializer.CARD_FIELDS) | {'models', 'ratings'})
+        self.assertEqual([model['name'] for model in tool['models']], ['Model 0'])
+        self.assertEqual(tool['ratings'][0]['review'], 'Good')
+
+    def test_detail_and_full_view_render_everything(self):
+        self.add_tools(1)
+        tool_id = AITool.objects.get().pk
+        full_fields = set(AIToolSerializer.Meta.fields) - {'category_id'}
+        self.assertEqual(set(self.client.get(f'/api/ai-tools/{tool_id}/').json()), full_fields)
+        self.assertEqual(set(self.client.get('/api/ai-tools/?view=full').json()['results'][0]), full_fields)
+
+    def test_expanded_list_queries_do_not_grow_with_tools(self):
+        def queries(count):
+            AITool.objects.all().delete()
+            self.add_tools(count)
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(self.client.get('/api/ai-tools/?view=full').status_code, 200)
+            return len(captured)
+
+        self.assertEqual(queries(2), queries(6))
+
+
+class ToolViewerContextTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='viewer', email='viewer@example.com')
+        self.other = CustomUser.objects.create_user(username='other', email='other@example.com')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_tools(self, count):
+        tools = [AITool.objects.create(name=f'Tool {i}', description='Does things', is_premium=True) for i in range(count)]
+        for tool in tools:
+            ToolRating.objects.create(user=self.other, tool=tool, rating=1)
+        ToolRating.objects.create(user=self.user, tool=tools[0], rating=5, review='Great')
+        UserFavorite.objects.create(user=self.user, tool=tools[-1])
+        return tools
+
+    def test_page_carries_the_viewers_rating_and_favorites(self):
+        tools = self.add_tools(3)
+        results = {tool['id']: tool for tool in self.client.get('/api/ai-tools/').json()['results']}
+        self.assertEqual(results[tools[0].pk]['user_rating']['rating'], 5)
+        self.assertEqual(results[tools[0].pk]['user_rating']['review'], 'Great')
+        self.assertIsNone(results[tools[1].pk]['user_rating'])
+        self.assertEqual([tool_id for tool_id, tool in results.items() if tool['is_favorite']], [tools[-1].pk])
+
+    def test_detail_carries_the_viewers_rating(self):
+        tools = self.add_tools(1)
+        tool = self.client.get(f'/api/ai-tools/{tools[0].pk}/').json()
+        self.assertEqual(tool['user_rating']['rating'], 5)
+        self.assertTrue(tool['is_favorite'])
+
+    def test_viewer_lookups_do_not_grow_with_tools(self):
+        def queries(url, count):
+            AITool.objects.all().delete()
+            self.add_tools(count)
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            return len(captured)
+
+        for url in ['/api/ai-tools/', '/api/ai-tools/premium/?page_size=20']:
+            self.assertEqual(queries(url, 2), queries(url, 8), url)
+
+
+class ToolFilterTests(TestCase):
+    def setUp(self):
+        self.writing = Category.objects.create(name='Writing', slug='writing')
+        self.coding = Category.objects.create(name='Coding', slug='coding')
+        self.user = CustomUser.objects.create_user(username='critic', email='critic@example.com')
+        self.client = APIClient()
+
+    def names(self, url):
+        return [tool['name'] for tool in self.client.get(url).json()['results']]
+
+    def test_filters(self):
+        AITool.objects.create(name='Quill', description='Writes', category=self.writing, is_popular=True, is_free=True)
+        AITool.objects.create(name='Ink', description='Writes', category=self.writing, is_premium=True, is_free=False)
+        AITool.objects.create(name='Coder', description='Codes', category=self.coding, is_popular=True, is_free=False)
+        self.assertEqual(sorted(self.names('/api/ai-tools/?is_popular=true')), ['Coder', 'Quill'])
+        self.assertEqual(self.names('/api/ai-tools/?category=writing&is_popular=true'), ['Quill'])
+        self.assertEqual(self.names('/api/ai-tools/?is_free=1'), ['Quill'])
+        self.assertEqual(self.names('/api/ai-tools/?is_premium=yes'), ['Ink'])
+        # Unparseable values are ignored rather than failing the request
+        self.assertEqual(len(self.names('/api/ai-tools/?is_popular=maybe')), 3)
+
+    def test_page_size_is_honored_and_capped(self):
+        for i in range(12):
+            AITool.objects.create(name=f'Tool {i}', description='Does things', is_popular=True)
+        response = self.client.get('/api/ai-tools/?is_popular=true&page_size=9').json()
+        self.assertEqual((response['count'], len(response['results'])), (12, 9))
+        with mock.patch.object(StandardPagination, 'max_page_size', 5):
+            self.assertEqual(len(self.client.get('/api/ai-tools/?page_size=100').json()['results']), 5)
+
+    def test_ordering_aliases_and_rating_filter(self):
+        AITool.objects.create(name='Unrated', description='New')
+        good = AITool.objects.create(name='Good', description='Fine')
+        best = AITool.objects.create(name='Best', description='Great')
+        fans = [CustomUser.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com') for i in range(2)]
+        ToolRating.objects.create(user=self.user, tool=good, rating=3)
+        ToolRating.objects.create(user=self.user, tool=best, rating=5)
+        for fan in fans:
+            UserFavorite.objects.create(user=fan, tool=good)
+        self.assertEqual(self.names('/api/ai-tools/?ordering=top-rated'), ['Best', 'Good', 'Unrated'])
+        self.assertEqual(self.names('/api/ai-tools/?ordering=most-favorited'), ['Good', 'Best', 'Unrated'])
+        self.assertEqual(self.names('/api/ai-tools/?ordering=name'), ['Best', 'Good', 'Unrated'])
+        self.assertEqual(self.names('/api/ai-tools/?ordering=newest'), ['Best', 'Good', 'Unrated'])
+        self.assertEqual(self.names('/api/ai-tools/?min_rating=4'), ['Best'])
+
+
+class ToolCollectionTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Writing', slug='writing')
+        for i in range(15):
+            AITool.objects.create(
+                name=f'Tool {i}', description='Does things', category=self.category if i % 3 else None,
+                is_premium=i % 2 == 0, is_free=i % 2 == 1,
+            )
+        self.client = APIClient()
+
+    def test_collections_are_paginated(self):
+        for url, expected in [
+            ('/api/ai-tools/premium/', AITool.objects.filter(is_premium=True)),
+            ('/api/ai-tools/free_tools/', AITool.objects.filter(is_free=True)),
+            ('/api/categories/writing/tools/', AITool.objects.filter(category=self.category)),
+        ]:
+            response = self.client.get(url + '?page_size=4').json()
+            self.assertEqual(response['count'], expected.count(), url)
+            self.assertEqual(len(response['results']), 4, url)
+            self.assertEqual(sorted(collect(self.client, url + '?page_size=4')), sorted(expected.values_list('id', flat=True)), url)
+
+    def test_collections_share_the_list_filters(self):
+        AITool.objects.filter(name='Tool 2').update(is_popular=True)
+        response = self.client.get('/api/categories/writing/tools/?is_popular=true').json()
+        self.assertEqual([tool['name'] for tool in response['results']], ['Tool 2'])
+
+    def test_ndjson_stream(self):
+        response = self.client.get('/api/ai-tools/premium/?stream=ndjson&fields=id,name')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        tools = [json.loads(line) for line in lines]
+        self.assertEqual(
+            sorted(tool['id'] for tool in tools),
+            sorted(AITool.objects.filter(is_premium=True).values_list('id', flat=True))
+        )
+        self.assertEqual(set(tools[0]), {'id', 'name'})
+
+
+class BlogListTests(TestCase):
+    def setUp(self):
+        self.author = CustomUser.objects.create_user(username='writer', email='writer@example.com')
+        self.reader = CustomUser.objects.create_user(username='reader', email='reader@example.com')
+        self.tool = AITool.objects.create(name='Writer', description='Writes')
+        self.client = APIClient()
+
+    def add_posts(self, count):
+        posts = []
+        for i in range(count):
+            post = BlogPost.objects.create(
+                title=f'Post {i}', content='<p>Long body</p>' * 50, excerpt='Short', author=self.author,
+                status=BlogPost.Status.PUBLISHED,
+            )
+            post.tools_mentioned.add(self.tool)
+            Comment.objects.create(post=post, author=self.reader, body='Nice')
+            Comment.objects.create(post=post, author=self.reader, body='Hidden', active=False)
+            posts.append(post)
+        return posts
+
+    def test_list_renders_summaries_with_counts(self):
+        post, = self.add_posts(1)
+        post.toggle_like(self.reader)
+        self.client.force_authenticate(self.reader)
+        item = self.client.get('/api/blog/').json()['results'][0]
+        self.assertEqual(set(item), set(BlogPostListSerializer.Meta.fields))
+        self.assertEqual(item['excerpt'], 'Short')
+        self.assertEqual(
+            (item['like_count'], item['comment_count'], item['active_comment_count'], item['is_liked']), (1, 2, 1, True)
+        )
+
+    def test_list_queries_do_not_grow_with_posts(self):
+        self.client.force_authenticate(self.reader)
+
+        def queries(count):
+            BlogPost.objects.all().delete()
+            self.add_posts(count)
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(len(self.client.get('/api/blog/').json()['results']), count)
+            return len(captured)
+
+        self.assertEqual(queries(2), queries(7))
+
+
+class CommentThreadTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='reader', email='reader@example.com')
+        self.post = BlogPost.objects.create(
+            title='Threads', content='Body', author=self.user, status=BlogPost.Status.PUBLISHED
+        )
+        self.client = APIClient()
+
+    def comment(self, parent=None, **kwargs):
+        return Comment.objects.create(post=self.post, author=self.user, body='Text', parent=parent, **kwargs)
+
+    def threads(self, query=''):
+        return self.client.get(f'/api/comments/?post={self.post.pk}{query}').json()['results']
+
+    def test_threads_are_nested_without_hidden_replies(self):
+        root = self.comment()
+        reply = self.comment(root)
+        nested = self.comment(reply)
+        self.comment(root, active=False)
+        thread, = self.threads()
+        self.assertEqual(thread['id'], root.pk)
+        self.assertEqual((thread['reply_count'], thread['descendant_count']), (1, 2))
+        self.assertEqual(thread['replies'][0]['id'], reply.pk)
+        self.assertEqual(thread['replies'][0]['replies'][0]['id'], nested.pk)
+
+    def test_thread_queries_do_not_grow_with_replies(self):
+        def queries(replies):
+            Comment.objects.all().delete()
+            for _ in range(2):
+                parent = self.comment()
+                for _ in range(replies):
+                    parent = self.comment(parent)
+            with CaptureQueriesContext(connection) as captured:
+                self.assertEqual(len(self.threads('&max_depth=10')), 2)
+            return len(captured)
+
+        self.assertEqual(queries(2), queries(6))
+
+    def test_replies_beyond_the_limits_are_linked(self):
+        root = self.comment()
+        replies = [self.comment(root) for _ in range(3)]
+        thread, = self.threads('&replies_limit=2')
+        self.assertEqual([reply['id'] for reply in thread['replies']], [reply.pk for reply in replies[:2]])
+        self.assertEqual(thread['reply_count'], 3)
+        rest = self.client.get(thread['more_replies']).json()['results']
+        self.assertEqual([reply['id'] for reply in rest], [replies[2].pk])
+        thread, = self.threads('&max_depth=0')
+        self.assertEqual(thread['replies'], [])
+        self.assertIsNotNone(thread['more_replies'])
+
+
+class CommentPathTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='reader', email='reader@example.com')
+        self.post = BlogPost.objects.create(
+            title='Threads', content='Body', author=self.user, status=BlogPost.Status.PUBLISHED
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def comment(self, parent=None):
+        return Comment.objects.create(post=self.post, author=self.user, body='Text', parent=parent)
+
+    def chain(self, length, parent=None):
+        comments = []
+        for _ in range(length):
+            parent = self.comment(parent)
+            comments.append(parent)
+        return comments
+
+    def position(self, comment):
+        comment = Comment.objects.get(pk=comment.pk)
+        return comment.thread_root_id, comment.depth, comment.path
+
+    def test_paths_follow_the_thread(self):
+        root, reply, nested = self.chain(3)
+        segments = [Comment.path_segment(comment.pk) for comment in (root, reply, nested)]
+        self.assertEqual(self.position(root), (root.pk, 0, segments[0]))
+        self.assertEqual(self.position(nested), (root.pk, 2, ''.join(segments)))
+        self.assertEqual(set(Comment.objects.in_subtrees([reply])), {nested})
+
+    def test_reparenting_moves_the_branch(self):
+        root, reply, nested = self.chain(3)
+        other = self.comment()
+        reply = Comment.objects.get(pk=reply.pk)
+        reply.parent = other
+        reply.save()
+        self.assertEqual(self.position(reply), (other.pk, 1, other.path + Comment.path_segment(reply.pk)))
+        self.assertEqual(self.position(nested), (other.pk, 2, reply.path + Comment.path_segment(nested.pk)))
+        self.assertEqual(set(Comment.objects.in_subtrees([root])), set())
+        self.assertEqual(set(Comment.objects.in_subtrees([other])), {reply, nested})
+        # Promoting a reply to a thread of its own
+        reply.parent = None
+        reply.save()
+        self.assertEqual(self.position(nested), (reply.pk, 1, reply.path + Comment.path_segment(nested.pk)))
+
+    def test_a_comment_cant_move_below_its_replies(self):
+        root, reply, nested = self.chain(3)
+        reply = Comment.objects.get(pk=reply.pk)
+        reply.parent = nested
+        with self.assertRaises(ValueError):
+            reply.save()
+        response = self.client.patch(f'/api/comments/{root.pk}/', {'parent': nested.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_depth_limit(self):
+        deepest = self.chain(Comment.MAX_DEPTH + 1)[-1]
+        self.assertEqual(deepest.depth, Comment.MAX_DEPTH)
+        self.assertLessEqual(len(deepest.path), Comment._meta.get_field('path').max_length)
+        response = self.client.post(
+            '/api/comments/', {'post': self.post.pk, 'parent': deepest.pk, 'body': 'Too deep'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_moves_respect_the_depth_limit_of_the_whole_branch(self):
+        target = self.chain(Comment.MAX_DEPTH - 1)[-1]
+        branch, _, _ = self.chain(3)
+        branch = Comment.objects.get(pk=branch.pk)
+        branch.parent = target
+        with self.assertRaises(ValueError):
+            branch.save()
+        response = self.client.patch(f'/api/comments/{branch.pk}/', {'parent': target.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # A branch that fits is moved
+        branch.parent = target.parent
+        branch.save()
+        self.assertEqual(Comment.objects.filter(thread_root_id=target.thread_root_id).aggregate(Max('depth'))['depth__max'], Comment.MAX_DEPTH)
+
+
+class BlogLikeTests(TestCase):
+    def setUp(self):
+        self.users = [CustomUser.objects.create_user(username=f'reader{i}', email=f'reader{i}@example.com') for i in range(2)]
+        self.post = BlogPost.objects.create(
+            title='Likeable', content='Body', author=self.users[0], status=BlogPost.Status.PUBLISHED
+        )
+        self.url = f'/api/blog/{self.post.slug}/toggle_like/'
+
+    def like_count(self):
+        return BlogPost.objects.get(pk=self.post.pk).like_count
+
+    def test_signed_in_likes_toggle(self):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        self.assertEqual(client.post(self.url).json(), {'message': 'Post liked', 'is_liked': True, 'like_count': 1})
+        other = APIClient()
+        other.force_authenticate(self.users[1])
+        self.assertEqual(other.post(self.url).json()['like_count'], 2)
+        self.assertEqual(client.post(self.url).json(), {'message': 'Like removed', 'is_liked': False, 'like_count': 1})
+        self.assertEqual(client.get(f'/api/blog/{self.post.slug}/check_like/').json(), {'is_liked': False, 'like_count': 1})
+        self.assertEqual(self.like_count(), 1)
+
+    def test_anonymous_likes_toggle_per_session(self):
+        first, second = APIClient(), APIClient()
+        self.assertEqual(first.post(self.url).json()['like_count'], 1)
+        self.assertEqual(second.post(self.url).json()['like_count'], 2)
+        self.assertEqual(first.post(self.url).json(), {'message': 'Like removed', 'is_liked': False, 'like_count': 1})
+        self.assertEqual(BlogPost.objects.get(pk=self.post.pk).anonymous_likes, 1)
+
+    def test_counters_never_go_negative(self):
+        client = APIClient()
+        client.post(self.url)
+        BlogPost.objects.filter(pk=self.post.pk).update(like_count=0, anonymous_likes=0)
+        self.assertEqual(client.post(self.url).json()['like_count'], 0)
+        self.assertEqual(self.like_count(), 0)
+
+    def test_likes_changed_through_the_relation_are_recounted(self):
+        BlogPost.objects.filter(pk=self.post.pk).update(like_count=5, anonymous_likes=2)
+        self.post.likes.add(*self.users)
+        self.assertEqual(self.like_count(), 4)
+        self.users[0].blog_likes.remove(self.post)
+        self.assertEqual(self.like_count(), 3)
+        self.post.likes.clear()
+        self.assertEqual(self.like_count(), 2)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class JWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = CustomUser.objects.create_user(username='member', email='member@example.com', password='secret-pass-1')
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post('/api/users/login/', {'email': 'member@example.com', 'password': 'secret-pass-1'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # Bearer tokens only, no session
+        self.client.logout()
+        return response.json()['tokens']
+
+    def test_bearer_token_authenticates_from_the_user_cache(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = self.client.get('/api/users/me/bootstrap/')
+        self.assertEqual(response.json()['profile']['email'], 'member@example.com')
+        # Token user and bootstrap state both come from caches: no queries at all
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/users/me/bootstrap/').status_code, 200)
+
+    def test_saving_a_user_drops_the_cached_copy(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get('/api/users/me/bootstrap/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/users/me/bootstrap/').status_code, 401)
+
+    def test_invalid_tokens_and_refresh(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(self.client.get('/api/users/me/bootstrap/').status_code, 401)
+        self.client.credentials()
+        access = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json').json()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/users/me/bootstrap/').status_code, 200)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.tools = [AITool.objects.create(name=f'Tool {name}', description='An AI tool') for name in 'ECADB']
+        AITool.objects.filter(pk__in=[tool.pk for tool in cls.tools[:2]]).update(average_rating=4.5)
+        cls.staff = CustomUser.objects.create_user(username='staff', email='staff@example.com', is_staff=True)
+        cls.published = [
+            BlogPost.objects.create(title=f'Post {i}', content='Body', author=cls.staff, status=BlogPost.Status.PUBLISHED)
+            for i in range(3)
+        ]
+        cls.drafts = [BlogPost.objects.create(title=f'Draft {i}', content='Body', author=cls.staff) for i in range(2)]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_search_falls_back_to_page_numbers(self):
+        response = self.client.get('/api/ai-tools/search/?q=tool&pagination=cursor')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), len(self.tools))
+
+    def test_cursor_follows_ordering_param(self):
+        ids = collect(self.client, '/api/ai-tools/?pagination=cursor&ordering=name&page_size=2')
+        self.assertEqual(ids, [tool.pk for tool in sorted(self.tools, key=lambda tool: tool.name)])
+
+    def test_cursor_reaches_null_keys(self):
+        ids = collect(self.client, '/api/ai-tools/?pagination=cursor&ordering=top-rated&page_size=1')
+        self.assertEqual(sorted(ids), sorted(tool.pk for tool in self.tools))
+        self.assertEqual(set(ids[:2]), {tool.pk for tool in self.tools[:2]})
+
+    def test_staff_reach_drafts(self):
+        self.client.force_authenticate(self.staff)
+        ids = collect(self.client, '/api/blog/?pagination=cursor&page_size=2')
+        self.assertEqual(len(ids), len(self.published) + len(self.drafts))
+        self.assertEqual(set(ids[-2:]), {post.pk for post in self.drafts})
+
+    def test_empty_cursor_value_means_null(self):
+        self.client.force_authenticate(self.staff)
+        cursor = base64.urlsafe_b64encode(json.dumps(['', str(self.drafts[1].pk)]).encode()).decode()
+        response = self.client.get(f'/api/blog/?cursor={cursor}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.json()['results']], [self.drafts[0].pk])
+
+
+class CategoryCacheTests(TestCase):
+    def test_popular_reflects_new_favorite(self):
+        category = Category.objects.create(name='Writing', slug='writing')
+        tool = AITool.objects.create(name='Writer', description='Writes', category=category)
+        user = CustomUser.objects.create_user(username='fan', email='fan@example.com')
+        client = APIClient()
+        before = client.get('/api/categories/popular/')
+        self.assertEqual(client.get('/api/categories/popular/')['X-Cache'], 'HIT')
+        UserFavorite.objects.create(user=user, tool=tool)
+        after = client.get('/api/categories/popular/')
+        self.assertEqual(after['X-Cache'], 'MISS')
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        self.assertEqual(after.json()[0]['popularity_score'], before.json()[0]['popularity_score'] + 1)
+
+
+class ViewerStateTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='viewer', email='viewer@example.com')
+        self.tool = AITool.objects.create(name='Writer', description='Writes')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bootstrap(self):
+        response = self.client.get('/api/users/me/bootstrap/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private')
+        return response
+
+    def test_bootstrap_returns_the_viewer_state(self):
+        post = BlogPost.objects.create(title='Liked', content='Body', author=self.user, status=BlogPost.Status.PUBLISHED)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.toggle_like(self.user)
+        UserFavorite.objects.create(user=self.user, tool=self.tool)
+        ToolRating.objects.create(user=self.user, tool=self.tool, rating=4)
+        Subscription.objects.create(user=self.user, plan_name='Pro', end_date=timezone.now() + timedelta(days=30))
+        state = self.bootstrap().json()
+        self.assertEqual(state['profile']['email'], 'viewer@example.com')
+        self.assertEqual(state['favorite_tool_ids'], [self.tool.pk])
+        self.assertEqual(state['tool_ratings'], {str(self.tool.pk): 4})
+        self.assertEqual(state['liked_post_ids'], [post.pk])
+        self.assertEqual(state['subscription']['plan_name'], 'Pro')
+        self.assertEqual(APIClient().get('/api/users/me/bootstrap/').status_code, 401)
+
+    def test_writes_invalidate_the_cached_state(self):
+        self.assertEqual(self.bootstrap()['X-Cache'], 'MISS')
+        self.assertEqual(self.bootstrap()['X-Cache'], 'HIT')
+        favorite = UserFavorite.objects.create(user=self.user, tool=self.tool)
+        self.assertEqual(self.bootstrap().json()['favorite_tool_ids'], [self.tool.pk])
+        favorite.delete()
+        self.assertEqual(self.bootstrap().json()['favorite_tool_ids'], [])
+        ToolRating.objects.create(user=self.user, tool=self.tool, rating=2)
+        self.assertEqual(self.bootstrap().json()['tool_ratings'], {str(self.tool.pk): 2})
+        # Someone else's writes keep this user's entry
+        other = CustomUser.objects.create_user(username='other', email='other@example.com')
+        UserFavorite.objects.create(user=other, tool=self.tool)
+        self.assertEqual(self.bootstrap()['X-Cache'], 'HIT')
+
+    def test_expired_subscription_drops_out_without_a_write(self):
+        Subscription.objects.create(user=self.user, plan_name='Trial', end_date=timezone.now() + timedelta(seconds=30))
+        self.assertEqual(self.bootstrap().json()['subscription']['plan_name'], 'Trial')
+        with mock.patch('time.time', return_value=time.time() + 31), \
+                mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=31)):
+            response = self.bootstrap()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIsNone(response.json()['subscription'])
+
+    @override_settings(VIEWER_VERSION_TIMEOUT=60)
+    def test_user_version_counters_expire(self):
+        label = f'viewer:{self.user.pk}'
+        self.client.get('/api/users/me/bootstrap/')
+        UserFavorite.objects.create(user=self.user, tool=self.tool)
+        self.assertIsNotNone(cache.get(VERSION_KEY.format(label=label)))
+        with mock.patch('time.time', return_value=time.time() + 61):
+            self.assertIsNone(cache.get(VERSION_KEY.format(label=label)))
+            self.assertIsNone(cache.get(BUMPED_KEY.format(label=label)))
+            response = self.client.get('/api/users/me/bootstrap/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['favorite_tool_ids'], [self.tool.pk])
+
+
+class FirebaseUserSyncTests(TestCase):
+    def test_pick_username_takes_the_smallest_free_suffix(self):
+        pick = CustomUserManager.pick_username
+        self.assertEqual(pick('alice', set()), 'alice')
+        self.assertEqual(pick('alice', {'alice', 'alice1'}), 'alice2')
+        self.assertEqual(pick('alice', {'alice', 'alice2', 'alicea'}), 'alice1')
+
+    def test_new_accounts_get_free_usernames(self):
+        CustomUser.objects.create_user(username='alice', email='alice@old.example')
+        CustomUser.objects.create_user(username='alice1', email='alice1@old.example')
+        user, created = CustomUser.objects.sync_firebase_user('alice@example.com')
+        self.assertTrue(created)
+        self.assertEqual(user.username, 'alice2')
+        self.assertFalse(user.has_usable_password())
+        long_name = 'x' * 200
+        user, _ = CustomUser.objects.sync_firebase_user('long@example.com', long_name)
+        self.assertEqual(user.username, 'x' * CustomUserManager.USERNAME_BASE_LENGTH)
+
+    def test_existing_email_returns_the_same_user(self):
+        user, _ = CustomUser.objects.sync_firebase_user('bob@example.com', 'bob')
+        again, created = CustomUser.objects.sync_firebase_user('bob@EXAMPLE.com', 'someone-else')
+        self.assertEqual((again.pk, created), (user.pk, False))
+
+    def test_username_lookup_is_one_query_however_many_are_taken(self):
+        for i in range(20):
+            CustomUser.objects.create_user(username=f'carol{i or ""}', email=f'carol{i}@old.example')
+        # Email lookup, taken usernames and the insert, plus the insert's savepoint
+        with self.assertNumQueries(5):
+            user, _ = CustomUser.objects.sync_firebase_user('carol@example.com')
+        self.assertEqual(user.username, 'carol20')
+
+    def test_lost_race_retries_with_another_username(self):
+        CustomUser.objects.create_user(username='dave', email='dave@old.example')
+        with mock.patch.object(CustomUserManager, 'free_username', side_effect=['dave', 'dave7']):
+            user, created = CustomUser.objects.sync_firebase_user('dave@example.com')
+        self.assertEqual((user.username, created), ('dave7', True))
+
+    def test_endpoint(self):
+        client = APIClient()
+        response = client.post('/api/users/sync_firebase_user/', {'email': 'erin@example.com'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['user']['username'], 'erin')
+        # The body's email alone proves nothing: no tokens
+        self.assertIsNone(response.json()['tokens'])
+        response = client.post('/api/users/sync_firebase_user/', {'email': 'erin@example.com'}, format='json')
+        self.assertEqual((response.status_code, response.json()['message']), (200, 'User already exists'))
+        self.assertEqual(client.post('/api/users/sync_firebase_user/', {}, format='json').status_code, 400)
+
+
+class ImportFirebaseUsersTests(TestCase):
+    def test_insert_resolves_concurrent_signups(self):
+        # Allocated before these two users signed up
+        allocator = UsernameAllocator(set())
+        users = [
+            CustomUser(username=allocator.allocate(CustomUser.objects.username_base(email)), email=email)
+            for email in ['ann@example.com', 'bob@example.com', 'cy@example.com']
+        ]
+        CustomUser.objects.create_user(username='ann', email='ann@other.com')
+        CustomUser.objects.create_user(username='bob2', email='bob@example.com')
+        created, skipped = ImportFirebaseUsers().insert(users, allocator)
+        self.assertEqual((created, skipped), (2, 1))
+        self.assertEqual(CustomUser.objects.get(email='ann@example.com').username, 'ann1')
+        self.assertTrue(CustomUser.objects.filter(email='cy@example.com').exists())
+
+
+class RelatedPostsTests(TestCase):
+    def test_update_post_matches_rebuild(self):
+        author = CustomUser.objects.create_user(username='writer', email='writer@example.com')
+        tool = AITool.objects.create(name='Chatbot', description='Chats')
+        titles = ['Chatbots for writing', 'Writing with prompts', 'Coding assistants', 'Chatbots for coding', 'Gardening']
+        posts = [
+            BlogPost.objects.create(
+                title=title, content='Body', author=author, status=BlogPost.Status.PUBLISHED,
+                category_tag='writing' if 'riting' in title else '',
+            )
+            for title in titles
+        ]
+        posts[2].tools_mentioned.add(tool)
+        posts[3].tools_mentioned.add(tool)
+        rebuild_index()
+        rebuilt = set(RelatedPost.objects.values_list('post_id', 'related_id', 'score'))
+        for post in posts:
+            update_post(post.pk)
+        self.assertEqual(set(RelatedPost.objects.values_list('post_id', 'related_id', 'score')), rebuilt)
+        self.assertTrue(rebuilt)
+        with self.assertNumQueries(9):
+            update_post(posts[3].pk)
+
+    def test_lists_refill_when_a_post_drops_out(self):
+        author = CustomUser.objects.create_user(username='writer', email='writer@example.com')
+        posts = [
+            BlogPost.objects.create(
+                title=f'Post {number}', content='Body', author=author, status=BlogPost.Status.PUBLISHED, category_tag='news'
+            )
+            for number in range(RELATED_LIMIT + 2)
+        ]
+        rebuild_index()
+        first, last = posts[0], posts[-1]
+        self.assertEqual(first.related_entries.count(), RELATED_LIMIT)
+        self.assertFalse(first.related_entries.filter(related=posts[1]).exists())
+        BlogPost.objects.filter(pk=last.pk).update(status=BlogPost.Status.DRAFT)
+        update_post(last.pk)
+        self.assertEqual(first.related_entries.count(), RELATED_LIMIT)
+        self.assertTrue(first.related_entries.filter(related=posts[1]).exists())
+        indexed = set(RelatedPost.objects.values_list('post_id', 'related_id', 'score'))
+        rebuild_index()
+        self.assertEqual(set(RelatedPost.objects.values_list('post_id', 'related_id', 'score')), indexed)
+
+
+class ConditionalGetTests(TestCase):
+    def test_delete_advances_last_modified(self):
+        tool = AITool.objects.create(name='Old tool', description='Gone soon')
+        client = APIClient()
+        since = client.get('/api/ai-tools/')['Last-Modified']
+        self.assertEqual(client.get('/api/ai-tools/', HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+        with mock.patch('time.time', return_value=2_000_000_000):
+            tool.delete()
+        response = client.get('/api/ai-tools/', HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], since)
+
+
+class BlogFeedTests(TestCase):
+    @override_settings(API_URL='https://api.example.com')
+    def test_feed_shared_across_hosts(self):
+        author = CustomUser.objects.create_user(username='editor', email='editor@example.com')
+        post = BlogPost.objects.create(
+            title='Launch', content='Body', author=author, status=BlogPost.Status.PUBLISHED, cover_image='blog_covers/launch.png'
+        )
+        client = APIClient()
+        first = client.get('/api/blog/latest/', HTTP_HOST='attacker.example')
+        second = client.get('/api/blog/latest/', HTTP_HOST='localhost')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(second.json()[0]['cover_image'], 'https://api.example.com/media/blog_covers/launch.png')
+        self.assertEqual(second.json()[0]['id'], post.pk)
+
+
+class AutocompleteTests(TestCase):
+    @override_settings(AUTOCOMPLETE_POPULARITY_REFRESH=60)
+    def test_new_favorites_reorder_after_the_refresh_interval(self):
+        first = AITool.objects.create(name='Draw Pro', description='Draws', is_popular=True)
+        second = AITool.objects.create(name='Draw Lite', description='Draws')
+        client = APIClient()
+
+        def names():
+            return [entry['label'] for entry in client.get('/api/autocomplete/?q=dra&types=tool').json()['results']]
+
+        self.assertEqual(names(), [first.name, second.name])
+        for i in range(11):
+            fan = CustomUser.objects.create_user(username=f'fan{i}', email=f'fan{i}@example.com')
+            UserFavorite.objects.create(user=fan, tool=second)
+        self.assertEqual(names(), [first.name, second.name])
+        with mock.patch('aitools.autocomplete.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertEqual(names(), [second.name, first.name])
+
+    @override_settings(AUTOCOMPLETE_POPULARITY_REFRESH=60)
+    def test_new_tools_appear_immediately(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/autocomplete/?q=sketch').json()['results'], [])
+        AITool.objects.create(name='Sketchbook', description='Draws')
+        self.assertEqual([entry['label'] for entry in client.get('/api/autocomplete/?q=sketch').json()['results']], ['Sketchbook'])
+
+    def test_long_prefix_matches_are_unique_and_ranked(self):
+        index = TypeaheadIndex([
+            {'type': 'tool', 'id': 1, 'label': 'Chat Chat', 'score': 1},
+            {'type': 'tool', 'id': 2, 'label': 'ChatGPT', 'score': 5},
+            {'type': 'tool', 'id': 3, 'label': 'Gemini', 'score': 9},
+        ])
+        self.assertEqual([entry['id'] for entry in index.search('chat')], [2, 1])
+        self.assertEqual([entry['id'] for entry in index.search('gpt')], [])
+
+
+FIREBASE_PROJECT = 'test-project'
+
+
+@override_settings(FIREBASE_PROJECT_ID=FIREBASE_PROJECT, FIREBASE_JWKS_URL='')
+class FirebaseAuthenticationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = jwt.algorithms.RSAAlgorithm.to_jwk(cls.private_key.public_key(), as_dict=True)
+        handle, cls.jwks_file = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w') as keys_file:
+            json.dump({'keys': [dict(jwk, kid='test-key', alg='RS256')]}, keys_file)
+        cls.settings_override = override_settings(FIREBASE_JWKS_FILE=cls.jwks_file)
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        os.remove(cls.jwks_file)
+        super().tearDownClass()
+
+    def setUp(self):
+        firebase_auth.key_set.__init__()
+        firebase_auth.token_cache.clear()
+        self.user = CustomUser.objects.create_user(username='ann', email='ann@example.com')
+        self.tool = AITool.objects.create(name='Writer', description='Writes')
+        self.client = APIClient()
+
+    def token(self, **overrides):
+        now = int(time.time())
+        claims = {
+            'iss': f'https://securetoken.google.com/{FIREBASE_PROJECT}', 'aud': FIREBASE_PROJECT,
+            'sub': 'firebase-uid', 'iat': now, 'exp': now + 3600, 'auth_time': now,
+            'email': 'ann@example.com', 'email_verified': True,
+        }
+        claims.update(overrides)
+        return jwt.encode(claims, self.private_key, algorithm='RS256', headers={'kid': 'test-key'})
+
+    def authenticate(self, **overrides):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token(**overrides)}')
+
+    def test_verified_token_authenticates_the_user(self):
+        self.authenticate()
+        response = self.client.get('/api/users/profile/')
+        self.assertEqual(response.json()['email'], 'ann@example.com')
+        response = self.client.post('/api/favorites/toggle_favorite/', {'tool_id': self.tool.pk}, format='json')
+        self.assertTrue(response.json()['is_favorite'])
+
+    def test_unverified_email_reads_anonymously(self):
+        self.authenticate(email_verified=False)
+        self.assertEqual(self.client.get('/api/ai-tools/').status_code, 200)
+        self.assertIsNone(self.client.get('/api/users/profile/').json()['id'])
+        response = self.client.post('/api/favorites/toggle_favorite/', {'tool_id': self.tool.pk}, format='json')
+        self.assertFalse(response.json()['is_favorite'])
+        self.assertFalse(UserFavorite.objects.exists())
+        response = self.client.post('/api/users/sync_firebase_user/', {'email': 'ann@example.com'}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_sync_creates_account_from_verified_token(self):
+        self.authenticate(email='new@example.com')
+        response = self.client.post('/api/users/sync_firebase_user/', {'email': 'other@example.com'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['user']['email'], 'new@example.com')
+        self.assertIsNotNone(response.json()['tokens'])
+
+    def test_expired_token_is_rejected(self):
+        self.authenticate(iat=int(time.time()) - 7200, exp=int(time.time()) - 3600)
+        self.assertEqual(self.client.get('/api/ai-tools/').status_code, 401)
+
+    def test_wrong_audience_is_rejected(self):
+        self.authenticate(aud='another-project')
+        self.assertEqual(self.client.get('/api/ai-tools/').status_code, 401)
+
+
+class SeoFilesTests(TestCase):
+    def test_generated_files_are_static(self):
+        author = CustomUser.objects.create_user(username='editor', email='editor@example.com')
+        post = BlogPost.objects.create(title='Launch', content='Body', author=author, status=BlogPost.Status.PUBLISHED)
+        with tempfile.TemporaryDirectory() as root, override_settings(SEO_FILES_ROOT=root):
+            call_command('generate_seo_files', stdout=StringIO())
+            with open(os.path.join(root, 'sitemap-posts-1.xml')) as sitemap:
+                self.assertIn(f'/blog/{post.slug}</loc>', sitemap.read())
+            self.assertTrue(os.path.exists(os.path.join(root, 'blog.rss')))
+            # Served by the web server (or runserver with DEBUG), not by a view that regenerates inline
+            self.assertEqual(APIClient().get('/sitemap.xml').status_code, 404)
+
+
+class RenderContentTests(TestCase):
+    def html(self, content):
+        return render_content(content)['content_html']
+
+    def test_script_urls_are_dropped(self):
+        for href in ['javascript:alert(1)', 'JaVaScRiPt:alert(1)', 'java\tscript:alert(1)', ' \x01javascript:alert(1)',
+                     'vbscript:msgbox(1)', 'data:text/html;base64,PHNjcmlwdD4=']:
+            self.assertEqual(self.html(f'<a href="{href}">x</a>'), '<a>x</a>', href)
+        self.assertEqual(self.html('<img src="data:image/svg+xml,&lt;svg onload=alert(1)&gt;">'), '<img>')
+
+    def test_safe_urls_are_kept(self):
+        self.assertEqual(
+            self.html('<a href="https://example.com/?a=1&amp;b=2">x</a>'),
+            '<a href="https://example.com/?a=1&amp;b=2" rel="noopener noreferrer">x</a>'
+        )
+        self.assertEqual(self.html('<a href="/blog/other">x</a>'), '<a href="/blog/other">x</a>')
+
+    def test_event_handlers_and_styles_are_dropped(self):
+        self.assertEqual(
+            self.html('<p onclick="alert(1)" style="x">a<img src="https://example.com/i.png" onerror="alert(1)"></p>'),
+            '<p>a<img src="https://example.com/i.png"></p>'
+        )
+
+    def test_dangerous_elements_are_dropped_with_their_content(self):
+        self.assertEqual(
+            self.html('<p>a<script>alert(1)</script><iframe src="https://x"></iframe><svg><g onload="x"/></svg>b</p>'),
+            '<p>ab</p>'
+        )
+
+    def test_attribute_values_are_escaped(self):
+        self.assertEqual(self.html('<a title=\'"><script>\'>x</a>'), '<a title="&quot;&gt;&lt;script&gt;">x</a>')
+
+    def test_outline_and_plain_text(self):
+        rendered = render_content('<h2>Intro</h2><p>One two</p><h2>Intro</h2>')
+        self.assertEqual([entry['anchor'] for entry in rendered['outline']], ['intro', 'intro-2'])
+        self.assertIn('<h2 id="intro-2">', rendered['content_html'])
+        self.assertEqual(rendered['word_count'], 4)
+
+    def test_command_renders_unrendered_posts(self):
+        author = CustomUser.objects.create_user(username='writer', email='writer@example.com')
+        post = BlogPost.objects.create(title='Old', content='<p>Hello <b>world</b></p>', author=author)
+        BlogPost.objects.filter(pk=post.pk).update(content_html='', content_hash='')
+        call_command('render_blog_posts', '--stale', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, '<p>Hello <b>world</b></p>')
+        self.assertEqual(post.summary, 'Hello world')
+
+
+@override_settings(BLOG_VIEW_FLUSH_INTERVAL=60)
+class ViewCountBufferTests(TestCase):
+    def setUp(self):
+        author = CustomUser.objects.create_user(username='writer', email='writer@example.com')
+        self.posts = [
+            BlogPost.objects.create(title=title, content='Body', author=author, status=BlogPost.Status.PUBLISHED)
+            for title in ['First', 'Second', 'Third']
+        ]
+        # Never leave counts behind for the exit-time flush
+        self.addCleanup(view_count_buffer.flush)
+
+    def test_views_are_merged_into_reads_until_flushed(self):
+        client = APIClient()
+        for _ in range(3):
+            response = client.get(f'/api/blog/{self.posts[0].slug}/')
+        self.assertEqual(response.json()['view_count'], 3)
+        self.assertEqual(BlogPost.objects.get(pk=self.posts[0].pk).view_count, 0)
+        view_count_buffer.flush()
+        self.assertEqual(BlogPost.objects.get(pk=self.posts[0].pk).view_count, 3)
+        self.assertEqual(client.get(f'/api/blog/{self.posts[0].slug}/').json()['view_count'], 4)
+
+    def test_flush_batches_posts_with_the_same_increment(self):
+        for post, views in zip(self.posts, [2, 2, 1]):
+            view_count_buffer.add(post.pk, views)
+        with self.assertNumQueries(2):
+            self.assertEqual(view_count_buffer.flush(), 5)
+        self.assertEqual(
+            list(BlogPost.objects.filter(pk__in=[post.pk for post in self.posts]).order_by('pk').values_list('view_count', flat=True)),
+            [2, 2, 1]
+        )
+        self.assertEqual(view_count_buffer.pending(self.posts[0].pk), 0)
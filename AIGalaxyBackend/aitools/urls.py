@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     UserViewSet,
     AiToolViewSet,
@@ -13,7 +14,9 @@ from .views import (
     NewsletterSubscriberViewSet,
     ToolSubmissionViewSet,
     BlogPostViewSet,
-    CommentViewSet
+    CommentViewSet,
+    cache_stats,
+    autocomplete
 )
 
 # Create a router and register all viewsets
@@ -34,5 +37,8 @@ router.register(r'blog', BlogPostViewSet, basename='blog')
 router.register(r'comments', CommentViewSet, basename='comments')
 
 urlpatterns = [
+    path('cache-stats/', cache_stats, name='cache-stats'),
+    path('autocomplete/', autocomplete, name='autocomplete'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
     path('', include(router.urls)),
 ]
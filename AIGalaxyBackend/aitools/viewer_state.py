@@ -0,0 +1,57 @@
+"""
+Per-user "viewer state" for the frontend's bootstrap call.
+
+Everything the UI needs to personalise pages after login (profile, favorite
+tools, ratings, liked posts, active subscription) is read with a handful of
+id-only queries and cached under the user's own version counter (see
+aitools.cache). Writes to any of it bump that counter (see aitools.signals and
+BlogPost.toggle_like), so the next bootstrap call rebuilds it.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache import bump_version, get_versions
+
+VIEWER_LABEL = 'viewer:{user_id}'
+STATE_KEY = 'aitools:viewer-state:{user_id}:{version}'
+
+
+def bump_viewer_version(user_id):
+    bump_version(VIEWER_LABEL.format(user_id=user_id), timeout=settings.VIEWER_VERSION_TIMEOUT)
+
+
+def build_viewer_state(user):
+    from .models import BlogPost, Subscription
+    from .serializers import UserSerializer
+
+    now = timezone.now()
+    subscription = Subscription.objects.filter(user=user, is_active=True, end_date__gt=now).values(
+        'id', 'plan_name', 'start_date', 'end_date', 'is_active'
+    ).first()
+    return {
+        'profile': UserSerializer(user).data,
+        'favorite_tool_ids': list(user.favorites.order_by('-created_at').values_list('tool_id', flat=True)),
+        'tool_ratings': dict(user.tool_ratings.values_list('tool_id', 'rating')),
+        'liked_post_ids': list(
+            BlogPost.likes.through.objects.filter(customuser_id=user.pk).values_list('blogpost_id', flat=True)
+        ),
+        'subscription': subscription,
+    }
+
+
+def get_viewer_state(user):
+    """Return (state, cached) for ``user``, building and caching the state on a miss"""
+    version, = get_versions(VIEWER_LABEL.format(user_id=user.pk), timeout=settings.VIEWER_VERSION_TIMEOUT)
+    key = STATE_KEY.format(user_id=user.pk, version=version)
+    state = cache.get(key)
+    if state is not None:
+        return state, True
+    state = build_viewer_state(user)
+    timeout = settings.VIEWER_STATE_CACHE_TIMEOUT
+    if state['subscription'] is not None:
+        # An expiring subscription must drop out without any write
+        remaining = (state['subscription']['end_date'] - timezone.now()).total_seconds()
+        timeout = max(1, min(timeout, int(remaining)))
+    cache.set(key, state, timeout)
+    return state, False
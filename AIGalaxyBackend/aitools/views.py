@@ -1,23 +1,44 @@
-from django.shortcuts import render
+import json
+from itertools import islice
+
+from django.shortcuts import get_object_or_404, render
+from django.http import StreamingHttpResponse
 
 # Create your views here.
 from rest_framework.response import Response
-from rest_framework.decorators import action
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated, SAFE_METHODS
+from django.conf import settings
 from django.contrib.auth import login
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import viewsets, status
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.utils.encoders import JSONEncoder
 from .models import (
     CustomUser, AITool, AIUsage, Subscription, Donation, Category, ContactMessage,
     ToolRating, UserFavorite, BlogPost, Comment, NewsletterSubscriber, ToolSubmission
 )
 from .serializers import (
     UserSerializer, UserSignUpSerializer, UserLoginSerializer, AIToolSerializer,
-    AIUsageSerializer, SubscriptionSerializer, DonationSerializer, CategorySerializer,
+    AIUsageSerializer, SubscriptionSerializer, DonationSerializer, CategorySerializer, CategoryStatsSerializer,
     ContactMessageSerializer, ToolRatingSerializer, UserFavoriteSerializer,
-    BlogPostSerializer, CommentSerializer, NewsletterSubscriberSerializer,
-    ToolSubmissionSerializer
+    BlogPostSerializer, BlogPostListSerializer, BlogFeedSerializer, RelatedBlogPostSerializer, CommentSerializer, CommentThread, NewsletterSubscriberSerializer,
+    ToolSubmissionSerializer, tool_viewer_context
 )
+from .search import search_tool_ids
+from .autocomplete import typeahead_index, MAX_LIMIT as AUTOCOMPLETE_MAX_LIMIT
+from .related import RELATED_LIMIT
+from .pagination import CursorPaginationMixin
+from .authentication import issue_tokens
+from .firebase_auth import FirebaseClaims
+from .cache import CachedResponseMixin, get_versions, get_stats as get_cache_stats
+from .conditional import ConditionalGetMixin
+from .view_counts import view_count_buffer
+from .viewer_state import get_viewer_state
+from .filters import AliasOrderingFilter, DeclarativeFilterBackend, parse_bool, parse_float, parse_str
 
 
 
@@ -44,7 +65,7 @@ class UserViewSet(viewsets.ModelViewSet):
             user = serializer.validated_data['user']
             login(request, user)
             return Response(
-                {"message": "Login successful", "user": UserSerializer(user).data},
+                {"message": "Login successful", "user": UserSerializer(user).data, "tokens": issue_tokens(user)},
                 status=status.HTTP_200_OK
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -65,10 +86,36 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='me/bootstrap', permission_classes=[IsAuthenticated])
+    def bootstrap(self, request):
+        """Profile, favorite tool ids, ratings, liked post ids and active subscription in one response"""
+        state, cached = get_viewer_state(request.user)
+        response = Response(state)
+        response['Cache-Control'] = 'private'
+        response['X-Cache'] = 'HIT' if cached else 'MISS'
+        return response
+
+    def tokens_for_synced_user(self, request, user):
+        """Tokens for a synced user, only when the caller proved to be that user"""
+        # The body's email alone is not proof of identity; a verified Firebase ID token is
+        claims = request.auth if isinstance(request.auth, FirebaseClaims) else None
+        firebase_email = claims.email if claims is not None and claims.identifies_user else None
+        if (request.user.is_authenticated and request.user.pk == user.pk) or firebase_email == user.email:
+            return issue_tokens(user)
+        return None
+
     @action(detail=False, methods=['post'], permission_classes=[AllowAny])
     def sync_firebase_user(self, request):
         """Sync Firebase user with Django backend - creates user if doesn't exist"""
         email = request.data.get('email')
+        if isinstance(request.auth, FirebaseClaims):
+            if not request.auth.identifies_user:
+                return Response(
+                    {'error': 'Verify your email address before signing in'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            # Sent with the user's ID token: the verified email wins over the body
+            email = request.auth.email
         username = request.data.get('username')
         firebase_uid = request.data.get('firebase_uid')  # Optional: Firebase user ID
         
@@ -78,98 +125,225 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Generate username from email if not provided
-        if not username:
-            username = email.split('@')[0]
-        
-        # Check if user already exists by email
-        try:
-            user = CustomUser.objects.get(email=email)
-            # User exists, return existing user data
-            return Response(
-                {
-                    'message': 'User already exists',
-                    'user': UserSerializer(user).data
-                },
-                status=status.HTTP_200_OK
-            )
-        except CustomUser.DoesNotExist:
-            # User doesn't exist, create new user
-            # Generate a unique username if the default one is taken
-            base_username = username
-            counter = 1
-            while CustomUser.objects.filter(username=username).exists():
-                username = f"{base_username}{counter}"
-                counter += 1
-            
-            # Create user without password (Firebase handles authentication)
-            # Set a random password that won't be used
-            import secrets
-            random_password = secrets.token_urlsafe(32)
-            user = CustomUser.objects.create_user(
-                username=username,
-                email=email,
-                password=random_password  # Password won't be used since Firebase handles auth
-            )
-            
-            return Response(
-                {
-                    'message': 'User created successfully',
-                    'user': UserSerializer(user).data
-                },
-                status=status.HTTP_201_CREATED
-            )
-class CategoryViewSet(viewsets.ModelViewSet):
+        user, created = CustomUser.objects.sync_firebase_user(email, username)
+        return Response(
+            {
+                'message': 'User created successfully' if created else 'User already exists',
+                'user': UserSerializer(user).data,
+                'tokens': self.tokens_for_synced_user(request, user)
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+class CategoryViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]  # public access
     lookup_field = 'slug'  # Use slug instead of ID for lookups
+    cache_actions = ('list', 'retrieve', 'popular')
+    conditional_actions = ('list', 'retrieve', 'popular')
+    # popularity_score counts favorites and ratings, kept on tools with .update() (no aitool bump)
+    cache_models = ('category', 'aitool', 'userfavorite', 'toolrating')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ['list', 'retrieve', 'popular']:
+            queryset = queryset.with_tool_stats().order_by('name')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in ['list', 'retrieve', 'popular']:
+            return CategoryStatsSerializer
+        return CategorySerializer
 
     # Optional: Custom action to list all tools in a category
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
     def tools(self, request, slug=None):
         """List all AI tools under a specific category"""
         category = self.get_object()
-        tools = category.tools.all()  # uses related_name='tools' in AITool
-        from .serializers import AIToolSerializer
-        serializer = AIToolSerializer(tools, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Same filters, card fields and pagination as /api/ai-tools/
+        tool_view = AiToolViewSet.for_request(request)
+        return tool_view.tool_collection(tool_view.get_queryset().filter(category=category))
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def popular(self, request):
-        """Get popular categories"""
-        # Return categories that have popular tools or are marked as popular
-        popular_categories = Category.objects.filter(
-            tools__is_popular=True
-        ).distinct()[:10]  # Limit to 10 popular categories
+        """Get the 10 most popular categories, ranked by popularity_score"""
+        # popularity_score = popular tools * Category.POPULAR_TOOL_WEIGHT + favorites + ratings of its tools
+        popular_categories = self.get_queryset().filter(tool_count__gt=0).order_by(
+            '-popularity_score', '-popular_tool_count', 'name'
+        )[:10]
         serializer = self.get_serializer(popular_categories, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """Hit/miss counters of the anonymous catalog response cache (staff only)"""
+    return Response(get_cache_stats())
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def autocomplete(request):
+    """Typeahead suggestions for ?q= over tools, models, categories and published posts, most popular first"""
+    types = {value for value in request.query_params.get('types', '').split(',') if value}
+    unknown = types - {'tool', 'model', 'category', 'post'}
+    if unknown:
+        return Response(
+            {'error': f"Unknown types: {', '.join(sorted(unknown))}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 8)), AUTOCOMPLETE_MAX_LIMIT))
+    except ValueError:
+        limit = 8
+    query = request.query_params.get('q', '')
+    return Response({'query': query, 'results': typeahead_index.search(query, limit=limit, types=types)})
+
+
 #ai tools views
-class AiToolViewSet(viewsets.ModelViewSet):
+def related_posts_limit(request, default=5):
+    """Size of a related-posts list from ?limit=, capped by what the index stores"""
+    try:
+        return max(1, min(int(request.query_params.get('limit', default)), RELATED_LIMIT))
+    except ValueError:
+        return default
+
+
+class AiToolViewSet(ConditionalGetMixin, CachedResponseMixin, CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = AITool.objects.all().order_by('-created_at')
     serializer_class = AIToolSerializer
     permission_classes = [AllowAny]
+    cache_actions = ('list', 'retrieve', 'premium', 'free_tools')
+    conditional_actions = ('list', 'retrieve', 'premium', 'free_tools')
+    cache_models = ('aitool', 'category', 'toolmodel', 'toolrating', 'userfavorite')
+    filter_backends = [DeclarativeFilterBackend, AliasOrderingFilter]
+    filter_fields = {
+        'category': ('category__slug', parse_str),
+        'is_popular': ('is_popular', parse_bool),
+        'is_free': ('is_free', parse_bool),
+        'is_premium': ('is_premium', parse_bool),
+        'affiliate': ('affiliate', parse_bool),
+        'min_rating': ('average_rating__gte', parse_float),
+    }
+    ordering_fields = ['created_at', 'name', 'average_rating', 'rating_count', 'favorite_count']
+    ordering_aliases = {
+        'newest': ['-created_at', '-id'],
+        'top-rated': [F('average_rating').desc(nulls_last=True), '-rating_count', '-id'],
+        'most-favorited': ['-favorite_count', '-id'],
+    }
+    ordering = ['-created_at', '-id']
+
+    def get_response_fields(self):
+        """Fields rendered for this request: compact cards on lists, full tools on detail"""
+        if self.request.method not in SAFE_METHODS:
+            return None
+        if not hasattr(self, '_response_fields'):
+            default = None if self.action == 'retrieve' else AIToolSerializer.CARD_FIELDS
+            self._response_fields = AIToolSerializer.requested_fields(self.request, default=default)
+        return self._response_fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_response_fields()
+        if fields is not None:
+            queryset = AIToolSerializer.optimize_queryset(queryset, fields)
+        return queryset
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
+        context['fields'] = self.get_response_fields()
         return context
 
+    def get_serializer(self, *args, **kwargs):
+        # Resolve the viewer's ratings/favorites for the whole page up front
+        kwargs.setdefault('context', self.get_serializer_context())
+        if args and args[0] is not None and self.request.method in SAFE_METHODS:
+            tools = args[0] if kwargs.get('many') else [args[0]]
+            kwargs['context'].update(tool_viewer_context(self.request, tools, self.get_response_fields()))
+        return super().get_serializer(*args, **kwargs)
+
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
-    def premium(self, request):
-        # return all premium tools
-        premium_tools = AITool.objects.filter(is_premium=True)
-        serializer = AIToolSerializer(premium_tools, many=True, context={'request': request})
+    def search(self, request):
+        """Full-text search over tools (?q=), best match first, last term prefix-matched"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'q parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        tool_ids = search_tool_ids(query)
+        page = self.paginate_queryset(tool_ids)
+        ids = page if page is not None else tool_ids
+        tools = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer([tools[pk] for pk in ids if pk in tools], many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
         return Response(serializer.data)
 
+    @classmethod
+    def for_request(cls, request, action='list'):
+        """Instantiate the viewset to reuse its filters, fields and pagination from another view"""
+        return cls(request=request, format_kwarg=None, action=action, args=(), kwargs={})
+
+    def list(self, request, *args, **kwargs):
+        return self.tool_collection(self.get_queryset())
+
+    def tool_collection(self, queryset):
+        """
+        Filter, order and paginate a collection of tools like list() does.
+        With ?stream=ndjson every matching tool is streamed instead, one JSON object per line.
+        """
+        queryset = self.filter_queryset(queryset)
+        if self.request.query_params.get('stream') == 'ndjson':
+            return self.stream_ndjson(queryset)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+    def stream_ndjson(self, queryset, chunk_size=500):
+        """Serialize the queryset in chunks from .iterator() instead of one list in memory"""
+        def lines():
+            tools = queryset.iterator(chunk_size=chunk_size)
+            while True:
+                chunk = list(islice(tools, chunk_size))
+                if not chunk:
+                    break
+                serializer = self.get_serializer(chunk, many=True)
+                yield ''.join(json.dumps(item, cls=JSONEncoder) + '\n' for item in serializer.data)
+
+        return StreamingHttpResponse(lines(), content_type='application/x-ndjson')
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny], url_path='related-posts')
+    def related_posts(self, request, pk=None):
+        """
+        Latest published blog posts mentioning this tool. The tool-to-post links
+        are stored already (the tools_mentioned table, indexed by tool), so this
+        is one indexed lookup without a separate similarity index.
+        """
+        tool = get_object_or_404(AITool.objects.only('id'), pk=pk)
+        posts = BlogPost.objects.published().filter(tools_mentioned=tool).only(*RelatedBlogPostSerializer.MODEL_FIELDS).order_by('-published_at', '-id')
+        limit = related_posts_limit(request)
+        return Response(RelatedBlogPostSerializer(posts[:limit], many=True, context={'request': request}).data)
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def premium(self, request):
+        """Get premium tools (paginated, or streamed with ?stream=ndjson)"""
+        return self.tool_collection(self.get_queryset().filter(is_premium=True))
+
     @action(detail=False, methods=['get'], permission_classes=[AllowAny])
     def free_tools(self, request):
-        """Get all free tools"""
-        free_tools = AITool.objects.filter(is_free=True).order_by('-created_at')
-        serializer = AIToolSerializer(free_tools, many=True, context={'request': request})
-        return Response(serializer.data)
+        """Get free tools (paginated, or streamed with ?stream=ndjson)"""
+        return self.tool_collection(self.get_queryset().filter(is_free=True))
 
-class AIUsageViewSet(viewsets.ModelViewSet):
+class AIUsageViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = AIUsage.objects.all().order_by('-created_at')
     serializer_class = AIUsageSerializer
     permission_classes = [AllowAny]
@@ -226,7 +400,7 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         return [IsAuthenticated()]
 
 
-class ToolRatingViewSet(viewsets.ModelViewSet):
+class ToolRatingViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     queryset = ToolRating.objects.all().order_by('-created_at')
     serializer_class = ToolRatingSerializer
 
@@ -236,9 +410,20 @@ class ToolRatingViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAuthenticated()]
 
+    # Saves and deletes run in a transaction so the AITool rating stats
+    # refreshed by the post_save/post_delete signals commit together with the rating
+    @transaction.atomic
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        serializer.save()
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
+
     def get_queryset(self):
         queryset = super().get_queryset()
         if self.request.user.is_authenticated and self.action in ['update', 'partial_update', 'destroy']:
@@ -275,18 +460,8 @@ class UserFavoriteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get user - either from Django session or from request data (Firebase)
-        user = None
-        if request.user.is_authenticated:
-            user = request.user
-        else:
-            # Try to get user from email in request (for Firebase users)
-            user_email = request.data.get('user_email')
-            if user_email:
-                try:
-                    user = CustomUser.objects.get(email=user_email)
-                except CustomUser.DoesNotExist:
-                    pass
+        # Session, our JWT or a verified Firebase ID token (see aitools/firebase_auth.py)
+        user = request.user if request.user.is_authenticated else None
 
         if not user:
             return Response({
@@ -423,7 +598,6 @@ class ToolSubmissionViewSet(viewsets.ModelViewSet):
                 {'error': 'Permission denied. Staff access required.'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        from django.utils import timezone
         submission = self.get_object()
         submission.status = ToolSubmission.Status.APPROVED
         submission.reviewed_by = request.user
@@ -443,7 +617,6 @@ class ToolSubmissionViewSet(viewsets.ModelViewSet):
                 {'error': 'Permission denied. Staff access required.'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        from django.utils import timezone
         submission = self.get_object()
         submission.status = ToolSubmission.Status.REJECTED
         submission.reviewed_by = request.user
@@ -459,20 +632,37 @@ class ToolSubmissionViewSet(viewsets.ModelViewSet):
         })
 
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class BlogPostViewSet(ConditionalGetMixin, CursorPaginationMixin, viewsets.ModelViewSet):
     """Professional blog post viewset with SEO and directory integration"""
     serializer_class = BlogPostSerializer
     permission_classes = [AllowAny]
     lookup_field = 'slug'
+    cursor_ordering = ('-published_at', '-id')
+    cache_models = ('blogpost', 'comment', 'aitool')
 
     def get_queryset(self):
-        queryset = BlogPost.objects.select_related('author').prefetch_related(
-            'tools_mentioned', 'likes', 'comments', 'comments__author', 'comments__replies'
-        )
+        if self.action == 'list':
+            # Summary cards: counts as annotations, stored summary, content never loaded
+            queryset = BlogPost.objects.select_related('author').defer(
+                'content', 'content_html', 'outline'
+            ).with_engagement(self.request.user)
+        elif self.action in ('toggle_like', 'check_like'):
+            # Likes are read from the like_count column; nothing else is needed
+            queryset = BlogPost.objects.only('id', 'slug', 'status', 'like_count', 'anonymous_likes')
+        elif self.action == 'related':
+            queryset = BlogPost.objects.only('id', 'slug', 'status')
+        elif self.action == 'share':
+            queryset = BlogPost.objects.only(
+                'id', 'slug', 'status', 'title', 'summary', 'cover_image', 'meta_title', 'meta_description'
+            )
+        else:
+            queryset = BlogPost.objects.select_related('author').prefetch_related(
+                'tools_mentioned', 'comments', 'comments__author', 'comments__replies'
+            ).with_engagement(self.request.user)
         
-        # Filter by status - only published for non-staff
+        # Filter by status - only published (and not scheduled for later) for non-staff
         if not self.request.user.is_staff:
-            queryset = queryset.filter(status=BlogPost.Status.PUBLISHED)
+            queryset = queryset.published()
         
         # Filter by featured
         featured = self.request.query_params.get('featured', None)
@@ -489,7 +679,13 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         if author:
             queryset = queryset.filter(author_id=author)
         
-        return queryset.order_by('-published_at', '-created_at')
+        # Same order as the (status, -published_at, -id) index and the keyset cursor
+        return queryset.order_by('-published_at', '-id')
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return BlogPostListSerializer
+        return BlogPostSerializer
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -503,6 +699,13 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def not_modified(self, request):
+        # A revalidated (304) detail view is still a view
+        if self.action == 'retrieve':
+            post_id = BlogPost.objects.filter(slug=self.kwargs['slug']).values_list('pk', flat=True).first()
+            if post_id is not None:
+                view_count_buffer.add(post_id)
+
     def perform_create(self, serializer):
         # Set author to current user if not provided
         if not serializer.validated_data.get('author'):
@@ -515,48 +718,24 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         """Toggle like status for a blog post - works with or without authentication"""
         post = self.get_object()
         
-        # Get user - either from Django session or from request data (Firebase)
-        user = None
-        if request.user.is_authenticated:
-            user = request.user
-        else:
-            # Try to get user from email in request (for Firebase users)
-            user_email = request.data.get('user_email')
-            if user_email:
-                try:
-                    user = CustomUser.objects.get(email=user_email)
-                except CustomUser.DoesNotExist:
-                    pass
-        
+        # Session, our JWT or a verified Firebase ID token (see aitools/firebase_auth.py)
+        user = request.user if request.user.is_authenticated else None
+
         if user:
-            # Authenticated user - toggle like in ManyToMany
-            if post.likes.filter(id=user.id).exists():
-                post.likes.remove(user)
-                is_liked = False
-            else:
-                post.likes.add(user)
-                is_liked = True
+            # Authenticated user - delete-or-insert on the likes table, counter moved with F()
+            is_liked = post.toggle_like(user)
         else:
-            # Anonymous user - increment anonymous likes counter
+            # Anonymous user - adjust the anonymous likes counter
             # Use session to prevent duplicate likes from same browser session
             session_key = f'liked_post_{post.id}'
-            if not request.session.get(session_key, False):
-                post.anonymous_likes += 1
-                post.save(update_fields=['anonymous_likes'])
-                request.session[session_key] = True
-                is_liked = True
-            else:
-                # Already liked in this session, remove like
-                if post.anonymous_likes > 0:
-                    post.anonymous_likes -= 1
-                    post.save(update_fields=['anonymous_likes'])
-                request.session[session_key] = False
-                is_liked = False
+            is_liked = not request.session.get(session_key, False)
+            post.adjust_anonymous_likes(1 if is_liked else -1)
+            request.session[session_key] = is_liked
         
         return Response({
             'message': 'Post liked' if is_liked else 'Like removed',
             'is_liked': is_liked,
-            'like_count': post.total_likes()
+            'like_count': post.like_count
         })
 
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
@@ -574,9 +753,52 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         
         return Response({
             'is_liked': is_liked,
-            'like_count': post.total_likes()
+            'like_count': post.like_count
         })
 
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def latest(self, request):
+        """Blog home feed: the latest visible posts, cached until a post goes live or a visible one is edited"""
+        size = getattr(settings, 'BLOG_FEED_SIZE', 10)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', size)), size))
+        except ValueError:
+            limit = size
+        key = f"aitools:blog-feed:{get_versions('blogfeed')[0]}"
+        feed = cache.get(key)
+        if feed is None:
+            posts = BlogPost.objects.published().select_related('author').defer(
+                'content', 'content_html', 'outline'
+            ).order_by('-published_at', '-id')[:size]
+            # No request in the context: nothing in the shared entry may depend on the caller
+            feed = BlogFeedSerializer(posts, many=True).data
+            # Superseded versions are never read again; the timeout reclaims them
+            cache.set(key, feed, settings.RESPONSE_CACHE_TIMEOUT)
+            cache_status = 'MISS'
+        else:
+            cache_status = 'HIT'
+        response = Response(feed[:limit])
+        response['X-Cache'] = cache_status
+        return response
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def related(self, request, slug=None):
+        """Most similar published posts, read from the precomputed related-posts index"""
+        posts = list(
+            BlogPost.objects.published().filter(
+                related_from__post__slug=slug,
+                related_from__post__status=BlogPost.Status.PUBLISHED,
+                related_from__post__published_at__lte=timezone.now(),
+            )
+            .annotate(similarity=F('related_from__score'))
+            .only(*RelatedBlogPostSerializer.MODEL_FIELDS)
+            .order_by('-similarity', '-published_at')[:related_posts_limit(request)]
+        )
+        if not posts:
+            # Unknown post (404), or one with nothing related yet
+            self.get_object()
+        return Response(RelatedBlogPostSerializer(posts, many=True, context={'request': request}).data)
+
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
     def share(self, request, slug=None):
         """Get shareable link for blog post with metadata"""
@@ -586,22 +808,25 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         return Response({
             'share_url': share_url,
             'title': post.title,
-            'excerpt': post.excerpt or (post.content[:200] + '...' if len(post.content) > 200 else post.content),
+            'excerpt': post.summary,
             'cover_image': request.build_absolute_uri(post.cover_image.url) if post.cover_image else None,
             'meta_title': post.meta_title or post.title,
-            'meta_description': post.meta_description or post.excerpt
+            'meta_description': post.meta_description or post.summary
         })
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(CursorPaginationMixin, viewsets.ModelViewSet):
     """Threaded comment viewset with reply support"""
     serializer_class = CommentSerializer
     permission_classes = [AllowAny]
+    cursor_ordering = ('created_at', 'id')
+
+    max_depth_limit = 10
+    replies_limit_max = 50
 
     def get_queryset(self):
-        queryset = Comment.objects.select_related('author', 'post', 'parent').prefetch_related(
-            'replies', 'replies__author'
-        ).filter(active=True)
+        # Replies are assembled in memory from a CommentThread, not prefetched
+        queryset = Comment.objects.select_related('author').filter(active=True)
         
         # Filter by post if provided
         post_id = self.request.query_params.get('post', None)
@@ -610,33 +835,76 @@ class CommentViewSet(viewsets.ModelViewSet):
         
         # Only show top-level comments or replies based on parent
         parent_id = self.request.query_params.get('parent', None)
-        if parent_id == 'null' or parent_id == '':
+        if parent_id == 'null' or parent_id == '' or (parent_id is None and post_id and self.action == 'list'):
+            # ?post= alone lists the post's top-level threads
             queryset = queryset.filter(parent__isnull=True)
         elif parent_id:
             queryset = queryset.filter(parent_id=parent_id)
         
-        return queryset.order_by('created_at')
+        return queryset.order_by('created_at', 'id')
+
+    def get_thread_context(self, comments):
+        """Load the active replies below the comments at once for in-memory threading"""
+        if not comments:
+            return {}
+
+        def bounded_int(param, default, maximum):
+            try:
+                return max(0, min(int(self.request.query_params[param]), maximum))
+            except (KeyError, ValueError):
+                return default
+
+        return {
+            'thread': CommentThread.for_comments(comments),
+            'max_depth': bounded_int('max_depth', CommentSerializer.DEFAULT_MAX_DEPTH, self.max_depth_limit),
+            'replies_limit': bounded_int('replies_limit', CommentSerializer.DEFAULT_REPLIES_LIMIT, self.replies_limit_max),
+        }
+
+    def list(self, request, *args, **kwargs):
+        """Paginated threads of a post (?post=) or replies of a comment (?parent=), built from one replies query"""
+        params = request.query_params
+        if not params.get('post') and params.get('parent') in (None, '', 'null'):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        comments = page if page is not None else list(queryset)
+        context = self.get_serializer_context()
+        context.update(self.get_thread_context(comments))
+        serializer = self.get_serializer(comments, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        context = self.get_serializer_context()
+        context.update(self.get_thread_context([instance]))
+        serializer = self.get_serializer(instance, context=context)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def thread(self, request, pk=None):
+        """The whole thread a comment belongs to, from its root, fetched by thread root in one query"""
+        comment = self.get_object()
+        root = comment if comment.depth == 0 else get_object_or_404(
+            Comment.objects.select_related('author'), pk=comment.thread_root_id, active=True
+        )
+        context = self.get_serializer_context()
+        context.update(self.get_thread_context([root]))
+        context['max_depth'] = Comment.MAX_DEPTH
+        serializer = self.get_serializer(root, context=context)
+        return Response(serializer.data)
 
     def get_permissions(self):
         # Allow anyone to view comments, but require auth to create/update/delete
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'thread']:
             return [AllowAny()]
         return [IsAuthenticated()]
 
     def perform_create(self, serializer):
-        # Get user - either from Django session or from request data (Firebase)
-        user = None
-        if self.request.user.is_authenticated:
-            user = self.request.user
-        else:
-            # Try to get user from email in request (for Firebase users)
-            user_email = self.request.data.get('user_email')
-            if user_email:
-                try:
-                    user = CustomUser.objects.get(email=user_email)
-                except CustomUser.DoesNotExist:
-                    pass
-        
+        # Session, our JWT or a verified Firebase ID token (see aitools/firebase_auth.py)
+        user = self.request.user if self.request.user.is_authenticated else None
+
         if not user:
             from rest_framework.exceptions import PermissionDenied
             raise PermissionDenied("Please log in to add comments")
@@ -64,8 +64,7 @@ const ToolCard: React.FC<ToolCardProps> = ({ tool, showFavorite = true, onFavori
 
     setIsLoading(true)
     try {
-      const userEmail = user?.email || user?.username
-      const result = await toggleFavorite(tool.id, userEmail)
+      const result = await toggleFavorite(tool.id)
       setIsFavorite(result.is_favorite)
       onFavoriteChange?.(tool.id, result.is_favorite)
     } catch (error) {
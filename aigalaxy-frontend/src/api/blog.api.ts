@@ -124,10 +124,10 @@ export const createBlogPost = async (data: {
   return response.data;
 };
 
-export const toggleLike = async (slug: string, userEmail?: string): Promise<{ message: string; is_liked: boolean; like_count: number }> => {
+export const toggleLike = async (slug: string): Promise<{ message: string; is_liked: boolean; like_count: number }> => {
   const response = await apiClient.post<{ message: string; is_liked: boolean; like_count: number }>(
     `/api/blog/${slug}/toggle_like/`,
-    userEmail ? { user_email: userEmail } : {}
+    {}
   );
   return response.data;
 };
@@ -148,11 +148,10 @@ export const getPostComments = async (postId: number): Promise<BlogComment[]> =>
   return Array.isArray(response.data) ? response.data : [];
 };
 
-export const addComment = async (postId: number, content: string, userEmail?: string): Promise<BlogComment> => {
+export const addComment = async (postId: number, content: string): Promise<BlogComment> => {
   const response = await apiClient.post<BlogComment>(`/api/comments/`, { 
     post: postId, 
-    body: content,
-    user_email: userEmail
+    body: content
   });
   return response.data;
 };
@@ -18,10 +18,9 @@ export interface ToggleFavoriteResponse {
   is_favorite: boolean;
 }
 
-export const toggleFavorite = async (toolId: number, userEmail?: string): Promise<ToggleFavoriteResponse> => {
+export const toggleFavorite = async (toolId: number): Promise<ToggleFavoriteResponse> => {
   const response = await apiClient.post<ToggleFavoriteResponse>("/api/favorites/toggle_favorite/", {
-    tool_id: toolId,
-    user_email: userEmail
+    tool_id: toolId
   });
   return response.data;
 };
@@ -210,9 +210,8 @@ export default function BlogPostPage() {
     
     try {
       setLiking(true)
-      // Send user email if logged in, otherwise send empty (for anonymous likes)
-      const userEmail = user?.email || user?.username || undefined
-      const result = await toggleLike(post.slug || slug, userEmail)
+      // The API client authenticates logged-in users; anonymous likes need nothing extra
+      const result = await toggleLike(post.slug || slug)
       if (post) {
         // Update post with new like status and count
         setPost({ ...post, is_liked: result.is_liked, like_count: result.like_count })
@@ -280,8 +279,7 @@ export default function BlogPostPage() {
     }
     
     try {
-      const userEmail = user.email || user.username
-      const result = await toggleFavorite(toolId, userEmail)
+      const result = await toggleFavorite(toolId)
       // Update local state based on response
       setToolFavorites(prev => {
         const newSet = new Set(prev)
@@ -316,8 +314,7 @@ export default function BlogPostPage() {
 
     try {
       setSubmittingComment(true)
-      const userEmail = user.email || user.username
-      const newComment = await addComment(post.id, commentText.trim(), userEmail)
+      const newComment = await addComment(post.id, commentText.trim())
       // Ensure the new comment has the correct structure
       const formattedComment: BlogComment = {
         ...newComment,
@@ -96,11 +96,8 @@ export default function BlogPage() {
 
     try {
       setLikingPosts(prev => new Set(prev).add(post.id))
-      // Get user email if logged in, otherwise undefined (for anonymous likes)
-      const userStr = typeof window !== 'undefined' ? localStorage.getItem('user') : null
-      const user = userStr ? JSON.parse(userStr) : null
-      const userEmail = user?.email || user?.username || undefined
-      const result = await toggleLike(post.slug || post.id.toString(), userEmail)
+      // The API client authenticates logged-in users; anonymous likes need nothing extra
+      const result = await toggleLike(post.slug || post.id.toString())
 
       setPosts(prevPosts =>
         prevPosts.map(p =>
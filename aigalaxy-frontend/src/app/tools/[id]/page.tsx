@@ -194,8 +194,7 @@ export default function ToolDetailPage() {
 
     setFavoriteLoading(true)
     try {
-      const userEmail = user?.email || user?.username
-      const result = await toggleFavorite(tool.id, userEmail)
+      const result = await toggleFavorite(tool.id)
       setIsFavorite(result.is_favorite)
     } catch (err: any) {
       console.error("Error toggling favorite:", err)
@@ -1,5 +1,6 @@
 // Centralized API client with proper connection handling
 import axios, { AxiosInstance, AxiosError } from 'axios'
+import { storage } from './storage'
 
 const BASE_URL: string = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
 
@@ -16,10 +17,31 @@ export const apiClient: AxiosInstance = axios.create({
   validateStatus: (status) => status < 500,
 })
 
-// Request interceptor
+// Firebase ID token of the signed-in user, refreshed by the SDK when it is about to expire
+const getAuthToken = async (): Promise<string | null> => {
+  if (typeof window === 'undefined') return null
+  try {
+    const { getAuthInstance } = await import('../config/firebase')
+    const authInstance = await getAuthInstance()
+    if (authInstance?.currentUser) {
+      const token = await authInstance.currentUser.getIdToken()
+      await storage.setItem('firebase_token', token)
+      return token
+    }
+  } catch (error) {
+    console.warn('Could not refresh Firebase token:', error)
+  }
+  // Firebase not restored yet: fall back to the token stored at login
+  return storage.getItem('firebase_token')
+}
+
+// Request interceptor: authenticate requests of signed-in users
 apiClient.interceptors.request.use(
-  (config) => {
-    // Add any auth tokens here if needed
+  async (config) => {
+    const token = await getAuthToken()
+    if (token && !config.headers.Authorization) {
+      config.headers.Authorization = `Bearer ${token}`
+    }
     return config
   },
   (error) => {